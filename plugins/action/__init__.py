@@ -4,17 +4,141 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import fnmatch
+import importlib
+import io
+import json
+import os
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from urllib.parse import urlparse
+
 from ansible import constants as C
+from ansible.errors import AnsibleActionFail
+from ansible.module_utils import basic
 from ansible.plugins.action import ActionBase
 from ansible.utils.vars import merge_hash
+from ansible.vars.clean import remove_internal_keys
 from ansible.module_utils.parsing.convert_bool import boolean
 from ansible.utils.display import Display
 
-from ..module_utils import oauth
+from ..module_utils import executor, oauth, transport
 
 
 class ActionModule(ActionBase):
 
+    def _in_process(self, wrap_async) -> bool:
+        '''Returns true if the module can run inside this process instead of as AnsiballZ'''
+        return (boolean(os.environ.get('QLIK_CLOUD_IN_PROCESS', False), strict=False)
+                and not wrap_async
+                and (self._connection.transport.split('.')[-1] == 'local'
+                     or getattr(self._connection, '_remote_is_local', False)))
+
+    def _execute_in_process(self, module_args, task_vars):
+        '''Runs the module's main() in this process and returns its result.
+
+        The module reads its args from where AnsiballZ would leave them and
+        its output is captured from stdout and stderr, so it behaves as it
+        would in its own interpreter without the zip being built, copied and
+        started.
+        '''
+        module_name = self._task.action
+        self._update_module_args(module_name, module_args, task_vars)
+        module = importlib.import_module(
+            'ansible_collections.qlik.cloud.plugins.modules.' + module_name.split('.')[-1])
+
+        basic._ANSIBLE_ARGS = json.dumps({'ANSIBLE_MODULE_ARGS': module_args}).encode('utf-8')
+        basic._ANSIBLE_PROFILE = 'legacy'
+        stdout, stderr = io.StringIO(), io.StringIO()
+        try:
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                module.main()
+        except SystemExit:
+            pass
+        except Exception as err:
+            return {
+                'failed': True,
+                'msg': 'Module %s failed: %s' % (module_name, err),
+                'exception': traceback.format_exc(),
+                'module_stderr': stderr.getvalue(),
+            }
+        finally:
+            basic._ANSIBLE_ARGS = None
+            transport.stop_token_refreshers()
+
+        try:
+            data = json.loads(stdout.getvalue())
+        except ValueError:
+            return {
+                'failed': True,
+                'msg': 'Module %s did not return a result' % module_name,
+                'module_stdout': stdout.getvalue(),
+                'module_stderr': stderr.getvalue(),
+            }
+        data['_ansible_parsed'] = True
+        remove_internal_keys(data)
+        return data
+
+    def _tenant_hosts(self, tenants, task_vars) -> list:
+        '''Returns the inventory hosts named by tenants.
+
+        tenants is a list, or a comma separated string, of host names, group
+        names and wildcards such as eu-*.
+        '''
+        if isinstance(tenants, str):
+            tenants = tenants.split(',')
+        groups = task_vars.get('groups', {})
+        hosts = []
+        for pattern in tenants:
+            pattern = pattern.strip()
+            if pattern in groups:
+                matched = groups[pattern]
+            else:
+                matched = fnmatch.filter(groups.get('all', []), pattern)
+            if not matched:
+                raise AnsibleActionFail('No tenants in the inventory match %s' % pattern)
+            hosts.extend(host for host in matched if host not in hosts)
+        return hosts
+
+    def _tenants(self, tenants, task_vars) -> list:
+        '''Returns the URI and credentials of every tenant for the tenants module param.
+
+        Entries that are dicts are passed on as they are. Hosts use their
+        access_token, or a token for their client_id and client_secret,
+        which are requested concurrently.
+        '''
+        entries = []
+        for entry in (tenants if isinstance(tenants, list) else [tenants]):
+            if isinstance(entry, dict):
+                entries.append(entry)
+                continue
+            for host in self._tenant_hosts(entry, task_vars):
+                hostvars = task_vars['hostvars'][host]
+                hostname = self._templar.template(hostvars.get('ansible_host', host))
+                entries.append({
+                    'name': host,
+                    'tenant_uri': 'https://' + hostname,
+                    'api_key': self._templar.template(hostvars.get('access_token')),
+                    'client_id': self._templar.template(hostvars.get('client_id')),
+                    'client_secret': self._templar.template(hostvars.get('client_secret')),
+                })
+
+        def authorize(entry):
+            if entry.get('api_key'):
+                return entry
+            token = oauth.cached_access_token(
+                hostname=urlparse(entry['tenant_uri']).netloc or entry['tenant_uri'],
+                client_id=entry['client_id'],
+                client_secret=entry['client_secret'])
+            return dict(entry, api_key=token['access_token'], token_expires_at=token['expires_at'])
+
+        pool = executor.BoundedExecutor(executor.workers())
+        outcomes = pool.map(authorize, entries)
+        for outcome in outcomes:
+            if outcome.failed:
+                raise outcome.error
+        return [outcome.value for outcome in outcomes]
+
     def run(self, tmp=None, task_vars=None):
 
         # individual modules might disagree but as the generic the action plugin, pass at this point.
@@ -30,18 +154,29 @@ class ActionModule(ActionBase):
         wrap_async = self._task.async_val and not self._connection.has_native_async
 
         kwargs = {}
-        if not 'tenant_uri' in self._task.args:
+        tenants = self._task.args.pop('tenants', None)
+        if tenants:
+            kwargs['tenants'] = self._tenants(tenants, task_vars)
+            # the module only uses these outside of the tenants it fans out to
+            for key in ('tenant_uri', 'api_key'):
+                if key not in self._task.args:
+                    kwargs[key] = kwargs['tenants'][0][key]
+        if not 'tenant_uri' in self._task.args and not tenants:
             kwargs['tenant_uri'] = 'https://' + task_vars.get('ansible_host')
-        if not 'api_key' in self._task.args:
+        if not 'api_key' in self._task.args and not tenants:
             access_token = task_vars.get('access_token')
             if not access_token:
                 client_id = self._templar.template(task_vars.get('client_id'))
                 client_secret = self._templar.template(task_vars.get('client_secret'))
-                token = oauth.get_access_token(
+                token = oauth.cached_access_token(
                     hostname = task_vars.get('ansible_host'),
                     client_id=client_id,
                     client_secret=client_secret)
                 access_token = token['access_token']
+                # lets the module renew the token if the task outlives it
+                kwargs['client_id'] = client_id
+                kwargs['client_secret'] = client_secret
+                kwargs['token_expires_at'] = token['expires_at']
                 result['ansible_facts'] = {'access_token': access_token}
                 cacheable = boolean(self._task.args.pop('cacheable', False))
                 result['_ansible_facts_cacheable'] = cacheable
@@ -49,7 +184,10 @@ class ActionModule(ActionBase):
         new_module_args = self._task.args.update(kwargs)
 
         # do work!
-        result = merge_hash(result, self._execute_module(module_args=new_module_args, task_vars=task_vars, wrap_async=wrap_async))
+        if self._in_process(wrap_async):
+            result = merge_hash(result, self._execute_in_process(self._task.args, task_vars))
+        else:
+            result = merge_hash(result, self._execute_module(module_args=new_module_args, task_vars=task_vars, wrap_async=wrap_async))
 
         # hack to keep --verbose from showing all the setup module result
         # moved from setup module as now we filter out all _ansible_ from result
@@ -0,0 +1,116 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: tenant
+    version_added: "0.1.0"
+    short_description: Keeps HTTP sessions to a Qlik Cloud tenant open across tasks.
+    description:
+        - Runs a persistent process per tenant that holds keep-alive HTTP sessions to the tenant.
+        - Modules run on the controller and send their REST requests through the process, so tasks
+          after the first reuse open TLS connections instead of connecting again.
+        - Authentication stays with the modules, every request carries the token of its task.
+    notes:
+        - Set C(ansible_connection=qlik.cloud.tenant) on the hosts of the tenants.
+        - Engine sessions used by the app modules are opened by each task as before.
+    extends_documentation_fragment:
+        - connection_pipelining
+    options:
+        pool_maxsize:
+            type: int
+            default: 10
+            description:
+                - Number of connections to the tenant kept open.
+            vars:
+                - name: qlik_cloud_pool_maxsize
+        persistent_connect_timeout:
+            type: int
+            default: 30
+            description:
+                - Seconds the connection waits for the next task before it closes.
+            ini:
+                - section: persistent_connection
+                  key: connect_timeout
+            env:
+                - name: ANSIBLE_PERSISTENT_CONNECT_TIMEOUT
+            vars:
+                - name: ansible_connect_timeout
+        persistent_command_timeout:
+            type: int
+            default: 30
+            description:
+                - Seconds a request through the connection may take.
+            ini:
+                - section: persistent_connection
+                  key: command_timeout
+            env:
+                - name: ANSIBLE_PERSISTENT_COMMAND_TIMEOUT
+            vars:
+                - name: ansible_command_timeout
+        persistent_log_messages:
+            type: bool
+            default: false
+            description:
+                - Logs every request and response to the Ansible log, including tokens.
+            ini:
+                - section: persistent_connection
+                  key: log_messages
+            env:
+                - name: ANSIBLE_PERSISTENT_LOG_MESSAGES
+            vars:
+                - name: ansible_persistent_log_messages
+'''
+
+
+import base64
+
+import requests
+
+from ansible.plugins.connection import NetworkConnectionBase
+
+from ..module_utils import transport
+
+
+class Connection(NetworkConnectionBase):
+    '''Persistent connection that forwards HTTP requests over pooled sessions'''
+
+    transport = 'qlik.cloud.tenant'
+    has_pipelining = True
+
+    def _connect(self):
+        if not self._connected:
+            self.queue_message('vvvv', 'opening sessions to %s' % self._play_context.remote_addr)
+            self._connected = True
+
+    def http_request(self, method: str, url: str, headers: dict, body: str = None, timeout: int = 10) -> dict:
+        '''Sends a request over the session for its host and returns the response.
+
+        Bodies are base64 encoded both ways. Timeouts and connection errors
+        are returned as an error instead of raised, so the module can handle
+        them like a failed request of its own.
+        '''
+        self._connect()
+        session = transport.get_session(url, self.get_option('pool_maxsize'))
+        request = requests.Request(
+            method, url, headers=headers,
+            data=base64.b64decode(body) if body is not None else None)
+        try:
+            res = session.send(request.prepare(), timeout=timeout)
+        except requests.exceptions.Timeout as err:
+            return {'error': 'timeout', 'message': str(err)}
+        except requests.exceptions.RequestException as err:
+            return {'error': 'connection', 'message': str(err)}
+        return {
+            'status': res.status_code,
+            'reason': res.reason,
+            'headers': dict(res.headers),
+            'body': base64.b64encode(res.content).decode('ascii'),
+            'elapsed': res.elapsed.total_seconds(),
+        }
+
+    def close(self):
+        transport.close_sessions()
+        super(Connection, self).close()
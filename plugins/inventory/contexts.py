@@ -10,27 +10,69 @@ DOCUMENTATION = '''
     short_description: Uses qlik-cli contexts as an inventory source.
     description:
         - Uses qlik-cli contexts as an inventory source for Qlik Cloud tenants.
+        - The source is either a qlik-cli C(contexts.yml), or a YAML file with I(plugin) set to
+          C(qlik.cloud.contexts) that reads C(~/.qlik/contexts.yml) and can set the cache options.
     notes:
         - Groups are created for server-type, e.g. cloud, windows.
         - Limited to client-id/secret and api-key authentication.
+        - With I(cache) enabled, the hosts read from the contexts file are kept in the cache plugin,
+          including their credentials, and the file is only parsed again once the cache expires or
+          the file changes.
+        - The I(facts) of every context are requested concurrently, up to C(QLIK_CLOUD_WORKERS) requests
+          at a time, and are cached with the hosts. A context whose facts could not all be read gets a
+          warning and C(qlik_facts_errors), which are cached as well until the cache expires or is flushed.
+    extends_documentation_fragment:
+        - inventory_cache
+    options:
+        plugin:
+            description: Name of the plugin
+            required: false
+            choices: ['qlik.cloud.contexts']
+        facts:
+            description:
+                - Tenant state to read for every context and set as host variables, so plays can branch
+                  on it without a task per host.
+                - C(licenses) sets C(qlik_license) from the license overview, C(group_settings) sets
+                  C(qlik_group_settings), C(identity_providers) sets C(qlik_identity_providers) and
+                  C(user) sets C(qlik_user) to the user the credentials belong to.
+            type: list
+            elements: str
+            choices: ['licenses', 'group_settings', 'identity_providers', 'user']
+            default: []
+            env:
+                - name: QLIK_CLOUD_CONTEXT_FACTS
 '''
 
 
-import yaml
+import os
+import re
 
 from urllib.parse import urlparse
 from pathlib import Path
 
 from ansible.errors import AnsibleParserError
-from ansible.plugins.inventory import BaseInventoryPlugin
+from ansible.module_utils.common.text.converters import to_native
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable
+from ansible.utils.display import Display
 
+from ..module_utils import executor, oauth, transport
+
+_CONFIG = re.compile(r'''^plugin:\s*['"]?qlik\.cloud\.contexts['"]?\s*$''', re.MULTILINE)
+_CONTEXTS = re.compile(r'^contexts:', re.MULTILINE)
+
+# host variable and endpoint of every fact
+_FACTS = {
+    'licenses': ('qlik_license', '/licenses/overview'),
+    'group_settings': ('qlik_group_settings', '/groups/settings'),
+    'identity_providers': ('qlik_identity_providers', '/identity-providers'),
+    'user': ('qlik_user', '/users/me'),
+}
+
+display = Display()
 
-class InventoryModule(BaseInventoryPlugin):
-    NAME = 'contexts'
 
-    def __init__(self):
-        super().__init__()
-        self._hosts = {}
+class InventoryModule(BaseInventoryPlugin, Cacheable):
+    NAME = 'contexts'
 
     def verify_file(self, path):
         ''' return true/false if this is possibly a valid file for this plugin to consume '''
@@ -38,57 +80,129 @@ class InventoryModule(BaseInventoryPlugin):
             # base class verifies that file exists and is readable by current user
             if path.endswith(('contexts.yml')):
                 return True
+            if not path.endswith(('.yml', '.yaml')):
+                return False
 
+            # look for the top-level keys without parsing, parse() reads the file once
             try:
                 with open(path, 'r') as stream:
-                    yaml_data = yaml.safe_load(stream)
+                    text = stream.read()
             except Exception as e:
-                print(e)
                 raise AnsibleParserError(e)
 
-            if ('contexts' in yaml_data
-                or ('plugin' in yaml_data and yaml_data['plugin'] == 'qlik.cloud.contexts')):
-
-                return True
-            else:
-                return False
-
-    def parse(self, inventory, loader, path, cache=False):
-        ''' parses the inventory file '''
-
-        # call base method to ensure properties are available for use with other helper methods
-        super(InventoryModule, self).parse(inventory, loader, path, cache)
-        self.set_options()
+            return bool(_CONFIG.search(text) or _CONTEXTS.search(text))
+        return False
 
+    def _load_hosts(self, path):
+        ''' returns the host entries for the contexts in a qlik-cli contexts file '''
         try:
             yaml_data = self.loader.load_from_file(path, cache=False)
         except Exception as e:
             raise AnsibleParserError(e)
 
-        if ((not 'contexts' in yaml_data)
-            and ('plugin' in yaml_data and yaml_data['plugin'] == 'qlik.cloud.contexts')):
-
-            path = str(Path.home().joinpath('.qlik/contexts.yml'))
-            try:
-                yaml_data = self.loader.load_from_file(path, cache=False)
-            except Exception as e:
-                raise AnsibleParserError(e)
+        # plain strings, the values the loader returns carry their origin which
+        # the cache plugin would store and restore with every value
+        def plain(value):
+            return str(value) if value is not None else None
 
+        hosts = []
         for context_name, context_data in yaml_data['contexts'].items():
             if not isinstance(context_data, dict):
                 context_data = {}
 
-            hostname = urlparse(context_data['server']).hostname
-            api_key = context_data.get('headers').get('Authorization')
+            api_key = (context_data.get('headers') or {}).get('Authorization')
             if api_key:
                 api_key = api_key[7:]
-            group = context_data.get('server-type')
-
-            if group:
-                self.inventory.add_group(group)
-            self.inventory.add_host(context_name, group)
-            self.inventory.set_variable(context_name, 'ansible_host', hostname)
-            self.inventory.set_variable(context_name, 'ansible_connection', 'local')
-            self.inventory.set_variable(context_name, 'client_id', context_data.get('oauth-client-id'))
-            self.inventory.set_variable(context_name, 'client_secret', context_data.get('oauth-client-secret'))
-            self.inventory.set_variable(context_name, 'access_token', api_key)
+            hosts.append({
+                'name': plain(context_name),
+                'group': plain(context_data.get('server-type')),
+                'ansible_host': plain(urlparse(context_data['server']).hostname),
+                'client_id': plain(context_data.get('oauth-client-id')),
+                'client_secret': plain(context_data.get('oauth-client-secret')),
+                'access_token': plain(api_key),
+            })
+        return hosts
+
+    def _gather_facts(self, hosts, facts):
+        ''' reads the facts of every host concurrently and adds them to the host entries '''
+        def fetch(job):
+            host, fact = job
+            api_key = host['access_token']
+            if not api_key:
+                api_key = oauth.cached_access_token(
+                    hostname=host['ansible_host'],
+                    client_id=host['client_id'],
+                    client_secret=host['client_secret'])['access_token']
+            rest = transport.tenant_rest('https://' + host['ansible_host'], api_key)
+            body = rest(path=_FACTS[fact][1], method='GET').json()
+            # lists are returned under data, next to their links
+            if isinstance(body, dict) and 'links' in body and 'data' in body:
+                body = body['data']
+            return body
+
+        jobs = [(host, fact) for host in hosts for fact in facts]
+        pool = executor.BoundedExecutor(executor.workers())
+        for (host, fact), outcome in zip(jobs, pool.map(fetch, jobs)):
+            host.setdefault('facts', {})
+            if outcome.failed:
+                display.warning('Could not read %s of %s: %s' % (fact, host['name'], to_native(outcome.error)))
+                host['facts'].setdefault('qlik_facts_errors', {})[fact] = to_native(outcome.error)
+            else:
+                host['facts'][_FACTS[fact][0]] = outcome.value
+
+    def _populate(self, hosts):
+        for host in hosts:
+            if host['group']:
+                self.inventory.add_group(host['group'])
+            self.inventory.add_host(host['name'], host['group'])
+            self.inventory.set_variable(host['name'], 'ansible_host', host['ansible_host'])
+            self.inventory.set_variable(host['name'], 'ansible_connection', 'local')
+            self.inventory.set_variable(host['name'], 'client_id', host['client_id'])
+            self.inventory.set_variable(host['name'], 'client_secret', host['client_secret'])
+            self.inventory.set_variable(host['name'], 'access_token', host['access_token'])
+            for key, value in host.get('facts', {}).items():
+                self.inventory.set_variable(host['name'], key, value)
+
+    def parse(self, inventory, loader, path, cache=True):
+        ''' parses the inventory file '''
+
+        # call base method to ensure properties are available for use with other helper methods
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+
+        with open(path, 'r') as stream:
+            is_config = bool(_CONFIG.search(stream.read()))
+        if is_config:
+            self._read_config_data(path)
+            contexts_path = str(Path.home().joinpath('.qlik/contexts.yml'))
+        else:
+            self.set_options()
+            if self.get_option('cache'):
+                self.load_cache_plugin()
+            contexts_path = path
+
+        try:
+            mtime = os.stat(contexts_path).st_mtime
+        except OSError as e:
+            raise AnsibleParserError(e)
+
+        # cache is false when the inventory is refreshed, e.g. with --flush-cache
+        use_cache = self.get_option('cache')
+        cache_key = self.get_cache_key(path)
+        facts = [str(fact) for fact in self.get_option('facts')]
+        hosts = None
+        if use_cache and cache:
+            try:
+                cached = self._cache[cache_key]
+                if cached.get('mtime') == mtime and cached.get('facts', []) == facts:
+                    hosts = cached['hosts']
+            except KeyError:
+                pass
+
+        if hosts is None:
+            hosts = self._load_hosts(contexts_path)
+            if facts:
+                self._gather_facts(hosts, facts)
+            if use_cache:
+                self._cache[cache_key] = {'mtime': mtime, 'facts': facts, 'hosts': hosts}
+
+        self._populate(hosts)
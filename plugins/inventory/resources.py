@@ -0,0 +1,269 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: resources
+    version_added: "0.1.0"
+    short_description: Uses the spaces, apps and reload tasks of Qlik Cloud tenants as an inventory source.
+    description:
+        - Lists the spaces, apps and reload tasks of one or more tenants and adds each of them as a host,
+          so plays can target tenant content with C(--limit), C(serial) and host patterns.
+        - The lists of all tenants are read concurrently, page by page. Only the host variables of each
+          resource are kept, so the memory used while listing does not grow with the size of the pages read.
+        - Hosts are named C(<tenant>_<kind>_<id>) and added to a group for their tenant and one for their
+          kind, C(spaces), C(apps) or C(reload_tasks).
+        - The tenant groups hold C(ansible_host), C(ansible_connection=local) and the credentials of the
+          tenant, so the modules of this collection run against the tenant of each host.
+        - The configuration file must end with C(qlik_resources.yml) or C(qlik_resources.yaml).
+    notes:
+        - The number of concurrent requests is set with C(QLIK_CLOUD_WORKERS).
+        - With I(cache) enabled, the resources are kept in the cache plugin and the tenants are only listed
+          again once the cache expires or with C(--flush-cache). Credentials are not cached.
+    extends_documentation_fragment:
+        - constructed
+        - inventory_cache
+    options:
+        plugin:
+            description: Name of the plugin
+            required: true
+            choices: ['qlik.cloud.resources']
+        tenants:
+            description:
+                - Tenants to list, each with C(tenant_uri) and either C(api_key), or C(client_id) and C(client_secret).
+                - C(name) sets the tenant group and host name prefix, by default the first label of the tenant host name.
+                - Values can be templates, e.g. C({{ lookup('env', 'QLIK_API_KEY') }}).
+            type: list
+            elements: dict
+            required: true
+        resources:
+            description: Kinds of resources to add as hosts.
+            type: list
+            elements: str
+            choices: ['spaces', 'apps', 'reload_tasks']
+            default: ['spaces', 'apps', 'reload_tasks']
+        page_size:
+            description: Number of resources requested per page, at most 100.
+            type: int
+            default: 100
+'''
+
+EXAMPLES = '''
+# qlik_resources.yml
+plugin: qlik.cloud.resources
+tenants:
+  - tenant_uri: https://mytenant.eu.qlikcloud.com
+    api_key: "{{ lookup('env', 'QLIK_API_KEY') }}"
+  - name: analytics
+    tenant_uri: https://analytics.us.qlikcloud.com
+    client_id: 3ae8b1f4c5d64c1e9ba6a6dc2fd0a3d1
+    client_secret: "{{ lookup('env', 'QLIK_CLIENT_SECRET') }}"
+resources:
+  - spaces
+  - apps
+keyed_groups:
+  # group apps by the space they are in, e.g. space_6407a9a4c1d8e2f3a5b6c7d8
+  - key: qlik_space_id
+    prefix: space
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.cache/ansible_inventory
+cache_timeout: 3600
+'''
+
+
+import queue
+import threading
+
+from urllib.parse import urlparse
+
+from ansible.errors import AnsibleError, AnsibleParserError
+from ansible.module_utils.common.text.converters import to_native
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+
+from ..module_utils import executor, oauth, transport
+
+# list endpoint, query and host variables for every kind of resource
+_KINDS = {
+    'spaces': ('space', '/spaces', {}, lambda r: {
+        'qlik_id': r.get('id'),
+        'qlik_name': r.get('name'),
+        'qlik_space_type': r.get('type'),
+        'qlik_owner_id': r.get('ownerId'),
+    }),
+    'apps': ('app', '/items', {'resourceType': 'app'}, lambda r: {
+        'qlik_id': r.get('resourceId'),
+        'qlik_name': r.get('name'),
+        'qlik_space_id': r.get('spaceId'),
+        'qlik_owner_id': r.get('ownerId'),
+        'qlik_published': (r.get('resourceAttributes') or {}).get('published'),
+        'qlik_last_reload_time': (r.get('resourceAttributes') or {}).get('lastReloadTime'),
+    }),
+    'reload_tasks': ('reload_task', '/reload-tasks', {}, lambda r: {
+        'qlik_id': r.get('id'),
+        'qlik_app_id': r.get('appId'),
+        'qlik_space_id': r.get('spaceId'),
+        'qlik_state': r.get('state'),
+        'qlik_next_execution': r.get('nextExecution'),
+    }),
+}
+
+# pages waiting to be added to the inventory, per worker
+_QUEUED_PAGES = 2
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+    NAME = 'qlik.cloud.resources'
+
+    def verify_file(self, path):
+        ''' return true/false if this is possibly a valid file for this plugin to consume '''
+        return (super(InventoryModule, self).verify_file(path)
+                and path.endswith(('qlik_resources.yml', 'qlik_resources.yaml')))
+
+    def _tenants(self) -> list:
+        ''' returns the tenants from the options, with their templates rendered '''
+        tenants = []
+        for entry in self.get_option('tenants'):
+            # plain strings, the SDK serializes the values it is given and their tags with them
+            entry = dict(
+                (key, str(self.templar.template(value)) if value is not None else None)
+                for key, value in entry.items())
+            if not entry.get('tenant_uri'):
+                raise AnsibleParserError('Every tenant needs a tenant_uri')
+            if not entry.get('api_key') and not (entry.get('client_id') and entry.get('client_secret')):
+                raise AnsibleParserError(
+                    'Tenant %s needs an api_key, or a client_id and client_secret' % entry['tenant_uri'])
+            hostname = urlparse(entry['tenant_uri']).hostname
+            entry['hostname'] = hostname
+            entry['name'] = self._sanitize_group_name(entry.get('name') or hostname.split('.')[0])
+            tenants.append(entry)
+        return tenants
+
+    def _pages(self, tenant: dict, kind: str):
+        ''' yields the host entries of one kind of resource in a tenant, a page at a time '''
+        prefix, path, query, hostvars = _KINDS[kind]
+        api_key = tenant.get('api_key')
+        if not api_key:
+            api_key = oauth.cached_access_token(
+                hostname=tenant['hostname'],
+                client_id=tenant['client_id'],
+                client_secret=tenant['client_secret'])['access_token']
+
+        rest = transport.tenant_rest(tenant['tenant_uri'], api_key)
+        params = dict(query, limit=min(max(int(self.get_option('page_size')), 1), 100))
+        while path:
+            page = rest(path=path, method='GET', params=params).json()
+            hosts = []
+            for resource in page.get('data', []):
+                host = hostvars(resource)
+                host.update(
+                    name='%s_%s_%s' % (tenant['name'], prefix, host['qlik_id']),
+                    tenant=tenant['name'],
+                    kind=kind)
+                hosts.append(host)
+            yield hosts
+            # the next link carries the query and cursor of the following page
+            path = ((page.get('links') or {}).get('next') or {}).get('href')
+            params = None
+
+    def _crawl(self, tenants: list):
+        ''' yields pages of host entries for every tenant and kind as they are read
+
+        The lists are read on QLIK_CLOUD_WORKERS threads which wait while the
+        pages already read have not been added to the inventory yet.
+        '''
+        jobs = [(tenant, str(kind)) for tenant in tenants for kind in self.get_option('resources')]
+        pool = executor.BoundedExecutor(executor.workers())
+        pages = queue.Queue(maxsize=max(pool.workers, 1) * _QUEUED_PAGES)
+        done = object()
+
+        def crawl(job):
+            tenant, kind = job
+            try:
+                for page in self._pages(tenant, kind):
+                    pages.put(page)
+            except Exception as err:
+                raise AnsibleError(
+                    'Failed to list %s of %s: %s' % (kind, tenant['tenant_uri'], to_native(err))) from err
+
+        outcomes = []
+
+        def run():
+            try:
+                outcomes.extend(pool.map(crawl, jobs))
+            finally:
+                pages.put(done)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        while True:
+            page = pages.get()
+            if page is done:
+                break
+            yield page
+        thread.join()
+
+        errors = [outcome.error for outcome in outcomes if outcome.failed]
+        if errors:
+            raise AnsibleParserError('; '.join(to_native(err) for err in errors))
+
+    def _add_tenant(self, tenant: dict):
+        self.inventory.add_group(tenant['name'])
+        self.inventory.set_variable(tenant['name'], 'qlik_tenant_uri', tenant['tenant_uri'])
+        self.inventory.set_variable(tenant['name'], 'ansible_host', tenant['hostname'])
+        self.inventory.set_variable(tenant['name'], 'ansible_connection', 'local')
+        self.inventory.set_variable(tenant['name'], 'access_token', tenant.get('api_key'))
+        self.inventory.set_variable(tenant['name'], 'client_id', tenant.get('client_id'))
+        self.inventory.set_variable(tenant['name'], 'client_secret', tenant.get('client_secret'))
+
+    def _add_hosts(self, hosts: list):
+        strict = self.get_option('strict')
+        compose, groups, keyed_groups = (
+            self.get_option('compose'), self.get_option('groups'), self.get_option('keyed_groups'))
+        constructed = compose or groups or keyed_groups
+        for host in hosts:
+            name = host['name']
+            self.inventory.add_group(host['kind'])
+            self.inventory.add_host(name, group=host['tenant'])
+            self.inventory.add_child(host['kind'], name)
+            hostvars = dict((key, value) for key, value in host.items() if key.startswith('qlik_'))
+            for key, value in hostvars.items():
+                self.inventory.set_variable(name, key, value)
+
+            # templates are rendered for every host, which is most of the time spent here
+            if constructed:
+                hostvars = self.inventory.get_host(name).get_vars()
+                self._set_composite_vars(compose, hostvars, name, strict=strict)
+                self._add_host_to_composed_groups(groups, hostvars, name, strict=strict)
+                self._add_host_to_keyed_groups(keyed_groups, hostvars, name, strict=strict)
+
+    def parse(self, inventory, loader, path, cache=True):
+        ''' parses the inventory file '''
+
+        # call base method to ensure properties are available for use with other helper methods
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        tenants = self._tenants()
+        for tenant in tenants:
+            self._add_tenant(tenant)
+
+        # cache is false when the inventory is refreshed, e.g. with --flush-cache
+        use_cache = self.get_option('cache')
+        cache_key = self.get_cache_key(path)
+        if use_cache and cache:
+            try:
+                self._add_hosts(self._cache[cache_key])
+                return
+            except KeyError:
+                pass
+
+        cached = []
+        for page in self._crawl(tenants):
+            self._add_hosts(page)
+            if use_cache:
+                cached.extend(page)
+        if use_cache:
+            self._cache[cache_key] = cached
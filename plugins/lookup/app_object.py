@@ -47,6 +47,8 @@ from requests.exceptions import HTTPError
 
 from qlik_sdk import AuthType, Config, Qlik, NxGetObjectOptions, NxContainerEntry
 
+from ..module_utils import transport
+
 
 class LookupModule(LookupBase):
 
@@ -64,6 +66,7 @@ class LookupModule(LookupBase):
             host='https://%s' % variables["ansible_host"],
             auth_type=AuthType.APIKey,
             api_key=api_key))
+        transport.pool_client(client)
 
         try:
             display.v('Opening app')
@@ -51,6 +51,8 @@ from dataclasses import asdict
 
 from qlik_sdk import AuthType, Config, Qlik
 
+from ..module_utils import transport
+
 display = Display()
 
 
@@ -83,6 +85,7 @@ class LookupModule(LookupBase):
           host=f'https://{host}',
           auth_type=AuthType.APIKey,
           api_key=api_key))
+      transport.pool_client(self.client)
 
       space_name = self.get_option('space')
       if space_name:
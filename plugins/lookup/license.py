@@ -41,6 +41,8 @@ from requests.exceptions import HTTPError
 
 from qlik_sdk import AuthType, Config, Qlik
 
+from ..module_utils import transport
+
 
 class LookupModule(LookupBase):
 
@@ -59,6 +61,7 @@ class LookupModule(LookupBase):
             host='https://%s' % variables["ansible_host"],
             auth_type=AuthType.APIKey,
             api_key=api_key))
+        transport.pool_client(client)
 
         ret = []
         try:
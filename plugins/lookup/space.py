@@ -20,6 +20,8 @@ DOCUMENTATION = """
       description:
         - The advanced filtering to use for the query.
         - Use %s in the filter as a placeholder for the search term.
+        - With the default filter, all terms are answered from one listing of the spaces of the tenant,
+          which is reused for C(QLIK_CLOUD_SPACE_CACHE_TTL) seconds. Other filters make one request per term.
       type: string
       default: (name eq "%s")
       ini:
@@ -31,69 +33,96 @@ DOCUMENTATION = """
       type: string
     flat:
       description:
-        - If set to I(True), the return value will be the user ID only.
-        - Otherwise the full user object will be returned.
+        - If set to I(True), the return value will be the space ID only.
+        - Otherwise the full space will be returned as a dict.
       type: bool
       default: true
   notes:
-    - an empty search term will lookup the user associated with the api key.
+    - an empty search term will return all spaces of the tenant.
+    - The listing is shared by the forks of a run and dropped when the C(qlik.cloud.space) module changes a space.
+      A name missing from it lists the spaces again once.
 """
 
 
-from ansible.errors import AnsibleError, AnsibleParserError
+from ansible.errors import AnsibleError
 from ansible.plugins.lookup import LookupBase
 from ansible.utils.display import Display
 
 from requests.exceptions import HTTPError
 
-from qlik_sdk import AuthType, Config, Qlik, Filter
+from ..module_utils import helper, space_resolver, transport
+from ..module_utils.sdk import AuthType, Config, Spaces
 
 display = Display()
 
+DEFAULT_FILTER = '(name eq "%s")'
+
 
 class LookupModule(LookupBase):
 
     def get_spaces(self, filter):
         try:
-            if (filter):
-                query = Filter(filter=filter)
-                display.vvv(u"Space lookup using filter '%s'" % query.filter)
-                spaces = self.client.spaces.filter(query)
-            else:
-                spaces = self.client.spaces.get_spaces()
-
-            if spaces:
-                return [space for space in spaces.pagination]
-            else:
-                raise AnsibleParserError()
-        except AnsibleParserError:
-            raise AnsibleError("No results from space lookup: %s" % filter)
+            display.vvv(u"Space lookup using filter '%s'" % filter)
+            spaces = [helper.asdict(space)
+                      for space in self.client.get_spaces(filter=filter or None, limit=100).pagination]
         except HTTPError as err:
-            AnsibleError('Error in space lookup, HTTP %s: %s' % (
+            raise AnsibleError('Error in space lookup, HTTP %s: %s' % (
                 err.response.status_code, err.response.text))
+        if not spaces:
+            raise AnsibleError("No results from space lookup: %s" % filter)
+        return spaces
+
+    def list_spaces(self, terms):
+        '''Returns the spaces named by terms, or all spaces, from the listing of the tenant'''
+        refreshed = False
+        while True:
+            try:
+                spaces = space_resolver.space_listing(self.tenant_uri, self.api_key, refresh=refreshed)
+            except HTTPError as err:
+                raise AnsibleError('Error in space lookup, HTTP %s: %s' % (
+                    err.response.status_code, err.response.text))
+            if not terms:
+                return list(spaces)
+
+            index = {}
+            for space in spaces:
+                index.setdefault(space['name'], []).append(space)
+            missing = [term for term in terms if term not in index]
+            if not missing:
+                return [space for term in terms for space in index[term]]
+            if refreshed:
+                raise AnsibleError("No results from space lookup: %s" % (self.filter % missing[0]))
+            # the space may have been created since the listing was cached
+            display.vvv(u"Space lookup relisting spaces for '%s'" % missing[0])
+            refreshed = True
 
     def run(self, terms, variables=None, **kwargs):
       display.v('Lookup spaces')
 
       self.set_options(var_options=variables, direct=kwargs)
 
-      api_key = self.get_option('api_key')
-      if api_key == None:
-          api_key = self._templar.template(variables['access_token'])
-
-      self.client = Qlik(Config(
-          host='https://%s' % variables["ansible_host"],
-          auth_type=AuthType.APIKey,
-          api_key=api_key))
+      self.api_key = self.get_option('api_key')
+      if self.api_key == None:
+          self.api_key = self._templar.template(variables['access_token'])
+      self.tenant_uri = 'https://%s' % variables["ansible_host"]
 
       self.filter = self.get_option('filter')
       if not self.filter:
-          self.filter = '(name eq "%s")'
+          self.filter = DEFAULT_FILTER
+
+      if self.filter == DEFAULT_FILTER:
+          ret = self.list_spaces(terms)
+      else:
+          self.client = Spaces(Config(
+              host=self.tenant_uri,
+              auth_type=AuthType.APIKey,
+              api_key=self.api_key))
+          transport.pool_client(self.client)
 
-      ret = self.get_spaces('') if not terms else []
-      for term in terms:
-          ret.extend(self.get_spaces(self.filter % term))
+          ret = self.get_spaces('') if not terms else []
+          for term in terms:
+              ret.extend(self.get_spaces(self.filter % term))
 
       if self.get_option('flat'):
-          ret = [space.id for space in ret]
+          ret = [space['id'] for space in ret]
       return ret
@@ -0,0 +1,112 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+DEFAULT_CACHE_DIR = '~/.cache/ansible_collections/qlik.cloud'
+
+
+def cache_dir() -> str:
+    '''Returns the directory for on-disk caches'''
+    return os.path.expanduser(os.environ.get('QLIK_CLOUD_CACHE_DIR', DEFAULT_CACHE_DIR))
+
+
+def env_number(name: str, default: float) -> float:
+    '''Returns a number from an environment variable, or the default if unset or invalid'''
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class TenantCache:
+    '''JSON file cache for one tenant, shared safely by concurrent forks.
+
+    Entries expire ttl seconds after they were stored. Changes are made
+    under an exclusive lock on a companion lock file and written to a temp
+    file that replaces the cache atomically, so readers never see a
+    partially written file.
+    '''
+
+    def __init__(self, tenant_uri: str, name: str, ttl: float = 300):
+        tenant = urlparse(tenant_uri).netloc or tenant_uri
+        digest = hashlib.sha1(tenant.encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(cache_dir(), '%s-%s.json' % (name, digest))
+        self.ttl = ttl
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, data: dict):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    @contextmanager
+    def locked(self):
+        '''Yields the cache contents under an exclusive lock and saves them on exit'''
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        with open(self.path + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                data = self._read()
+                yield data
+                self._write(data)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def entry(self, key: str):
+        '''Returns the entry for a key with the time it was stored, or None if missing or expired'''
+        entry = self._read().get(key)
+        if not entry or time.time() - entry['time'] > self.ttl:
+            return None
+        return entry
+
+    def get(self, key: str):
+        '''Returns the value stored for a key, or None if missing or expired'''
+        entry = self.entry(key)
+        return entry['value'] if entry else None
+
+    def set(self, key: str, value):
+        self.update({key: value})
+
+    def update(self, values: dict):
+        '''Stores several values at once'''
+        now = time.time()
+        with self.locked() as data:
+            for key, value in values.items():
+                data[key] = {'time': now, 'value': value}
+            for key in [k for k, v in data.items() if now - v['time'] > self.ttl]:
+                del data[key]
+
+    def delete(self, *keys):
+        with self.locked() as data:
+            for key in keys:
+                data.pop(key, None)
+
+    def delete_where(self, predicate):
+        '''Removes every entry for which predicate(key, value) is true'''
+        with self.locked() as data:
+            for key in [k for k, v in data.items() if predicate(k, v['value'])]:
+                del data[key]
+
+    def clear(self):
+        with self.locked() as data:
+            data.clear()
@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import difflib
+import json
+import re
+
+from .cache import env_number
+
+DEFAULT_CONTEXT = 3
+DEFAULT_MAX_BYTES = 64 * 1024
+
+_HUNK = re.compile(r'^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@')
+
+
+def _lines(value) -> list:
+    '''Returns text as is and anything else as JSON with sorted keys, split into lines'''
+    if value is None:
+        return []
+    if not isinstance(value, str):
+        value = json.dumps(value, indent=2, sort_keys=True, default=str)
+    return value.splitlines()
+
+
+def _shift(line: str, offset: int) -> str:
+    '''Moves the line numbers of a hunk header down by offset'''
+    match = _HUNK.match(line)
+    if not match or not offset:
+        return line
+    return '@@ -%s%s +%s%s @@' % (
+        int(match.group(1)) + offset, match.group(2) or '',
+        int(match.group(3)) + offset, match.group(4) or '')
+
+
+def render(before, after, name: str = '', context: int = None, max_bytes: int = None) -> dict:
+    '''Returns an Ansible diff holding a unified diff of before and after.
+
+    Text is compared line by line and other values as canonical JSON, so
+    key order does not show up as a change. Lines shared at the start and
+    end are cut before comparing, which keeps large scripts and documents
+    with small changes fast. The diff is cut off after max_bytes.
+    '''
+    if context is None:
+        context = int(env_number('QLIK_CLOUD_DIFF_CONTEXT', DEFAULT_CONTEXT))
+    if max_bytes is None:
+        max_bytes = int(env_number('QLIK_CLOUD_DIFF_MAX_BYTES', DEFAULT_MAX_BYTES))
+
+    old, new = _lines(before), _lines(after)
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    offset = max(prefix - context, 0)
+    end = max(suffix - context, 0)
+
+    lines = difflib.unified_diff(
+        old[offset:len(old) - end], new[offset:len(new) - end],
+        fromfile='before: %s' % name if name else 'before',
+        tofile='after: %s' % name if name else 'after',
+        n=context, lineterm='')
+
+    output = []
+    size = 0
+    for line in lines:
+        line = _shift(line, offset)
+        size += len(line) + 1
+        if max_bytes and size > max_bytes:
+            output.append('... diff truncated after %s bytes' % max_bytes)
+            break
+        output.append(line)
+
+    return {'prepared': '\n'.join(output) + '\n' if output else ''}
@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .cache import env_number
+
+DEFAULT_WORKERS = 4
+
+
+def workers() -> int:
+    '''Returns the worker count from QLIK_CLOUD_WORKERS'''
+    return max(int(env_number('QLIK_CLOUD_WORKERS', DEFAULT_WORKERS)), 1)
+
+
+def limits() -> dict:
+    '''Returns per-endpoint caps from QLIK_CLOUD_WORKER_LIMITS, e.g. "create=2,delete=1"'''
+    caps = {}
+    for entry in os.environ.get('QLIK_CLOUD_WORKER_LIMITS', '').split(','):
+        endpoint, _, value = entry.partition('=')
+        try:
+            caps[endpoint.strip()] = max(int(value), 1)
+        except ValueError:
+            continue
+    return caps
+
+
+class Outcome:
+    '''Result of one task, or the exception it raised'''
+
+    def __init__(self, value=None, error: Exception = None):
+        self.value = value
+        self.error = error
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+
+class BoundedExecutor:
+    '''Runs tasks on a fixed number of threads and collects results in order.
+
+    Tasks can hold limit(endpoint) around the calls they make so no more
+    than the configured cap for that endpoint run at the same time, e.g.
+    to keep deletes serial while creates run in parallel. An exception in
+    one task is recorded in its Outcome and does not stop the others.
+    '''
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, limits: dict = None):
+        self.workers = workers
+        self._semaphores = {
+            endpoint: threading.BoundedSemaphore(cap) for endpoint, cap in (limits or {}).items()}
+
+    @contextmanager
+    def limit(self, endpoint: str):
+        '''Holds a slot for endpoint while the block runs, if the endpoint is capped'''
+        semaphore = self._semaphores.get(endpoint)
+        if semaphore is None:
+            yield
+            return
+        with semaphore:
+            yield
+
+    def map(self, fn, items: list) -> list:
+        '''Returns an Outcome of fn(item) for every item, in the order of items'''
+        def run(item):
+            try:
+                return Outcome(value=fn(item))
+            except Exception as err:
+                return Outcome(error=err)
+
+        if self.workers <= 1 or len(items) <= 1:
+            return [run(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as pool:
+            return list(pool.map(run, items))
@@ -1,28 +1,107 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import threading
+
 from ansible.module_utils.basic import AnsibleModule
-from qlik_sdk import AuthType, Config, Qlik
+from weakref import WeakKeyDictionary
 
-def asdict(obj, classkey=None):
-    if isinstance(obj, dict):
-        data = {}
-        for (k, v) in obj.items():
-            data[k] = asdict(v, classkey)
-        return data
-    elif hasattr(obj, "_ast"):
-        return asdict(obj._ast())
-    elif hasattr(obj, "__iter__") and not isinstance(obj, str):
-        return [asdict(v, classkey) for v in obj]
-    elif hasattr(obj, "__dict__"):
-        data = dict([(key, asdict(value, classkey)) 
-            for key, value in obj.__dict__.items() 
-            if not callable(value) and not key.startswith('_') and key != 'auth'])
-        if classkey is not None and hasattr(obj, "__class__"):
-            data[classkey] = obj.__class__.__name__
-        return data
+from . import response_cache, sdk, transport
+from .sdk import AuthType, Config
+
+_module_instruments = WeakKeyDictionary()
+_instruments_lock = threading.Lock()
+
+CONNECTION_PARAMS = ['client_id', 'client_secret', 'token_expires_at', 'tenants']
+
+_SCALAR, _DICT, _AST, _ITER, _OBJECT = range(1, 6)
+_KIND = 7
+_CALLABLE = 8
+_plans = {}
+_fields = {}
+
+def _plan(cls) -> int:
+    '''Returns how asdict converts instances of a class, computed once per class'''
+    attrs = set()
+    for base in cls.__mro__:
+        attrs.update(vars(base))
+    if issubclass(cls, dict):
+        plan = _DICT
+    elif '_ast' in attrs:
+        plan = _AST
+    elif '__iter__' in attrs and not issubclass(cls, str):
+        plan = _ITER
+    elif cls.__dictoffset__:
+        plan = _OBJECT
     else:
-        return obj
+        plan = _SCALAR
+    if '__call__' in attrs:
+        plan |= _CALLABLE
+    _plans[cls] = plan
+    return plan
+
+def asdict(obj, classkey=None):
+    '''Converts SDK objects, dataclasses and containers to plain dicts and lists.
+
+    Public attributes are copied from each object's __dict__, skipping
+    callables and the auth reference held by SDK objects. Objects that
+    provide _ast() are converted from its result. How each class is handled
+    is worked out once and cached, and nested values are converted from an
+    explicit stack, so deep documents do not hit the recursion limit.
+    '''
+    plans = _plans
+    root = [None]
+    stack = [(root, 0, obj)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        target, key, value = pop()
+        cls = type(value)
+        kind = (plans.get(cls) or _plan(cls)) & _KIND
+        if kind == _AST:
+            push((target, key, value._ast()))
+            continue
+        if kind == _SCALAR:
+            target[key] = value
+            continue
+
+        if kind == _DICT:
+            data = {}
+            for k, v in value.items():
+                if (plans.get(type(v)) or _plan(type(v))) == _SCALAR:
+                    data[k] = v
+                else:
+                    data[k] = None
+                    push((data, k, v))
+        elif kind == _ITER:
+            data = []
+            for i, v in enumerate(value):
+                if (plans.get(type(v)) or _plan(type(v))) == _SCALAR:
+                    data.append(v)
+                else:
+                    data.append(None)
+                    push((data, i, v))
+        else:
+            data = {}
+            fields = _fields.get(cls)
+            if fields is None:
+                fields = _fields[cls] = {}
+            for k, v in value.__dict__.items():
+                public = fields.get(k)
+                if public is None:
+                    public = fields[k] = k[:1] != '_' and k != 'auth'
+                if not public:
+                    continue
+                plan = plans.get(type(v)) or _plan(type(v))
+                if plan == _SCALAR:
+                    data[k] = v
+                elif not plan & _CALLABLE:
+                    data[k] = None
+                    push((data, k, v))
+            if classkey is not None:
+                data[classkey] = cls.__name__
+        target[key] = data
+    return root[0]
 
 def to_camel_case(snake_str):
     components = snake_str.split('_')
@@ -31,7 +110,7 @@ def to_camel_case(snake_str):
 def construct_state_from_params(module_params: dict, ignore_params=[]):
     '''Returns true if existing space is different to module params, otherwise false'''
     state = {}
-    ignore_params += ['state', 'tenant_uri', 'api_key', 'space']
+    ignore_params += ['state', 'tenant_uri', 'api_key', 'space', 'return_fields', 'items'] + CONNECTION_PARAMS
     for k, v in module_params.items():
         if k in ignore_params:
             continue
@@ -39,7 +118,148 @@ def construct_state_from_params(module_params: dict, ignore_params=[]):
 
     return state
 
-def get_client(module: AnsibleModule, Client=Qlik) -> Qlik:
+def item_options(argument_spec: dict, required=('name',)) -> dict:
+    '''Returns the suboptions for an items param from a module's argument spec.
+
+    Options left unset on an item are taken from the module params, so only
+    the natural key is required and no defaults are applied per item.
+    '''
+    options = {}
+    for name, spec in argument_spec.items():
+        if name in ['items', 'return_fields', 'tenant_uri', 'api_key'] + CONNECTION_PARAMS:
+            continue
+        spec = {k: v for k, v in spec.items() if k not in ('default', 'required')}
+        spec['required'] = name in required
+        options[name] = spec
+    return options
+
+def tenant_options() -> dict:
+    '''Returns the suboptions for a tenants param'''
+    return dict(
+        name=dict(type='str', required=False),
+        tenant_uri=dict(type='str', required=True),
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False),
+    )
+
+class _ListProjection(dict):
+    '''Placeholder for a projected list, keyed by the index of each kept element'''
+
+def _resolve_pointer(data, segments: list):
+    '''Returns (True, value) for the value at a JSON pointer, or (False, None)'''
+    value = data
+    for segment in segments:
+        if isinstance(value, dict) and segment in value:
+            value = value[segment]
+        elif isinstance(value, list) and segment.isdigit() and int(segment) < len(value):
+            value = value[int(segment)]
+        else:
+            return False, None
+    return True, value
+
+def _close_lists(data):
+    if isinstance(data, _ListProjection):
+        return [_close_lists(v) for _, v in sorted(data.items())]
+    if isinstance(data, dict):
+        return {k: _close_lists(v) for k, v in data.items()}
+    return data
+
+def project(data, fields: list):
+    '''Returns only the named keys or JSON pointers in fields from data.
+
+    Plain names select top-level keys. Entries starting with / are JSON
+    pointers, and the selected value is placed at the same path in the
+    result; lists on the path keep the selected elements in their
+    original order. Fields that do not exist are left out.
+    '''
+    if not fields or not isinstance(data, dict):
+        return data
+
+    result = {}
+    for field in fields:
+        if not field.startswith('/'):
+            if field in data:
+                result[field] = data[field]
+            continue
+
+        segments = [s.replace('~1', '/').replace('~0', '~') for s in field[1:].split('/')]
+        found, value = _resolve_pointer(data, segments)
+        if not found:
+            continue
+
+        source, target = data, result
+        for segment in segments[:-1]:
+            key = int(segment) if isinstance(source, list) else segment
+            source = source[key]
+            if key not in target:
+                target[key] = _ListProjection() if isinstance(source, list) else {}
+            elif target[key] is source:
+                break
+            target = target[key]
+        else:
+            target[int(segments[-1]) if isinstance(source, list) else segments[-1]] = value
+
+    return _close_lists(result)
+
+def _token_refresher(module: AnsibleModule):
+    '''Returns a TokenRefresher if the module was given the OAuth client that issued api_key'''
+    params = module.params
+    if not params.get('client_id') or not params.get('client_secret'):
+        return None
+
+    def fetch():
+        auth = sdk.Auth(Config(
+            host=params['tenant_uri'],
+            auth_type=AuthType.OAuth2,
+            scope=['user_default'],
+            client_id=params['client_id'],
+            client_secret=params['client_secret']))
+        return auth.authorize()
+
+    return transport.TokenRefresher(
+        fetch, params['api_key'], params.get('token_expires_at'),
+        margin=transport.token_margin(), log=module.log)
+
+def _root(module: AnsibleModule) -> AnsibleModule:
+    '''Returns the AnsibleModule behind the proxies used for items and tenants'''
+    while hasattr(module, 'parent'):
+        module = module.parent
+    return module
+
+def _instruments(module: AnsibleModule, retries: int):
+    '''Returns the interceptors shared by all clients of a module for one tenant'''
+    tenant_uri = module.params['tenant_uri']
+    with _instruments_lock:
+        tenants = _module_instruments.setdefault(_root(module), {})
+        if tenant_uri not in tenants:
+            cache = None
+            if response_cache.enabled():
+                cache = response_cache.ResponseCache(
+                    tenant_uri, response_cache.max_bytes(), log=module.log)
+            tenants[tenant_uri] = (
+                transport.RetryInterceptor(retries=retries, log=module.log),
+                transport.CallMetrics(),
+                cache,
+                transport.ConditionalWrites(),
+                _token_refresher(module))
+        return tenants[tenant_uri]
+
+def get_client(module: AnsibleModule, Client=None,
+               pool_maxsize=transport.DEFAULT_POOL_MAXSIZE,
+               retries=transport.DEFAULT_RETRIES) -> 'sdk.Qlik':
+    '''Returns an SDK client whose requests share one keep-alive session per tenant.
+
+    Client defaults to the full Qlik client, which loads every API of the SDK;
+    pass the API class the module needs, e.g. Spaces, to keep startup fast.
+    Under the qlik.cloud.tenant connection, requests go through the sessions
+    held by the connection process.
+    '''
+    if Client is None:
+        Client = sdk.Qlik
+    if getattr(module, '_socket_path', None):
+        transport.use_connection(module._socket_path)
     client = Client(Config(
         host=module.params['tenant_uri'],
         auth_type=AuthType.APIKey,
@@ -56,7 +276,38 @@ def get_client(module: AnsibleModule, Client=Qlik) -> Qlik:
             res.status_code))
         return res
 
-    client.auth.rest.interceptors["response"].use(log_res)
-    client.auth.rest.interceptors["request"].use(log_req)
+    retry, metrics, cache, conditional, refresher = _instruments(module, retries)
+    request_hooks = [metrics.request, log_req]
+    response_hooks = [retry, metrics.response, log_res]
+    if refresher is not None:
+        request_hooks.insert(0, refresher.request)
+        response_hooks.insert(0, refresher.response)
+    if cache is not None:
+        request_hooks.append(cache.request)
+        response_hooks.append(cache.response)
+    request_hooks.append(conditional.request)
+    response_hooks.append(conditional.response)
+
+    for auth in transport.pool_client(client, pool_maxsize):
+        auth.rest.interceptors["response"].use(response_hooks)
+        auth.rest.interceptors["request"].use(request_hooks)
+        if refresher is not None:
+            refresher.bind(auth.config)
 
     return client
+
+def request_stats(module: AnsibleModule) -> dict:
+    '''Returns the request statistics collected for all clients of a module for its tenant'''
+    instruments = _module_instruments.get(_root(module), {}).get(module.params['tenant_uri'])
+    if instruments is None:
+        return {}
+    retry, metrics, cache, conditional, refresher = instruments
+    stats = {
+        'retries': retry.count,
+        'api_calls': metrics.summary(),
+    }
+    if cache is not None:
+        stats['cache_hits'] = cache.hits
+    if refresher is not None:
+        stats['token_refreshes'] = refresher.count
+    return stats
@@ -1,13 +1,20 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import os
+import time
+
 from ansible.errors import AnsibleError
 from ansible.module_utils.common.text.converters import to_native
 from ansible.utils.display import Display
 
 from requests.exceptions import HTTPError
 
-from qlik_sdk import AuthType, Config, Auth
+from .cache import TenantCache
+from .sdk import AuthType, Config, Auth
+from .transport import token_margin
+
+DEFAULT_EXPIRES_IN = 3600
 
 
 def get_access_token(hostname: str, client_id: str, client_secret: str):
@@ -41,3 +48,83 @@ def get_access_token(hostname: str, client_id: str, client_secret: str):
             err.response.status_code, err.response.text))
     except Exception as err:
         raise AnsibleError('Error getting oauth token: %s' % to_native(err))
+
+
+def _token_cache(hostname: str):
+    if os.environ.get('QLIK_CLOUD_TOKEN_CACHE', '1') == '0':
+        return None
+    # Entries are kept for a day at most; whether a token is usable is
+    # decided by the expiry stored with it.
+    return TenantCache(f'https://{hostname}', 'token', ttl=86400)
+
+
+def _usable(token) -> bool:
+    return bool(token) and token['expires_at'] - token_margin() > time.time()
+
+
+def _expiring(token: dict) -> dict:
+    '''Returns the token with the time it expires, one hour if the endpoint does not say'''
+    expires_in = token.get('expires_in') or DEFAULT_EXPIRES_IN
+    return dict(token, expires_at=time.time() + float(expires_in))
+
+
+def cached_access_token(hostname: str, client_id: str, client_secret: str):
+    """
+    get oauth token for Qlik Cloud tenant, reusing a cached token until shortly before it expires
+
+    The token returned has an expires_at key with the Unix time at which
+    it expires.
+
+    Tokens are cached on the controller per hostname and client_id, so
+    tasks and forks of a run share one token. The first fork to find no
+    usable token requests one while holding the cache lock, and the
+    others wait for it and then use the same token.
+
+    Parameters
+    ----------
+    hostname: str
+        Hostname of the tenant
+    client_id: str
+        Client ID for the OAuth client
+    client_secret: str
+        Client secret associated with the ID
+    """
+    cache = _token_cache(hostname)
+    if cache is None:
+        return _expiring(get_access_token(hostname, client_id, client_secret))
+
+    display = Display()
+    try:
+        token = cache.get(client_id)
+        if _usable(token):
+            return token
+        with cache.locked() as data:
+            token = data.get(client_id, {}).get('value')
+            if _usable(token):
+                return token
+            token = _expiring(get_access_token(hostname, client_id, client_secret))
+            data[client_id] = {'time': time.time(), 'value': token}
+            return token
+    except OSError as err:
+        display.warning('Token cache unavailable: %s' % to_native(err))
+        return _expiring(get_access_token(hostname, client_id, client_secret))
+
+
+def forget_access_token(hostname: str, client_id: str):
+    """
+    drop the cached token for a client, e.g. after the tenant rejected it
+
+    Parameters
+    ----------
+    hostname: str
+        Hostname of the tenant
+    client_id: str
+        Client ID for the OAuth client
+    """
+    cache = _token_cache(hostname)
+    if cache is None:
+        return
+    try:
+        cache.delete(client_id)
+    except OSError as err:
+        Display().warning('Token cache unavailable: %s' % to_native(err))
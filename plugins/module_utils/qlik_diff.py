@@ -1,32 +1,73 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+def _pointer(path: tuple) -> str:
+    '''Returns the JSON pointer for a tuple of keys'''
+    return ''.join('/' + str(key).replace('~', '~0').replace('/', '~1') for key in path)
+
+
 class QlikDiff:
+    '''Compares a resource with the desired state and builds a JSON Patch.
+
+    Top-level attributes whose desired value is None are not managed.
+    Nested dicts are compared key by key, so a change deep inside options
+    or meta results in operations on just the keys that changed: add for
+    keys the resource does not have, remove for keys it has but the desired
+    state does not, and replace for values that differ. Identical subtrees
+    are skipped with a single comparison. Lists, and attributes the resource
+    does not have yet, are replaced as a whole.
+    '''
+
     def __init__(self, existing: dict, desired: dict):
         self.existing = existing
         self.desired = desired
         self.differences = []
+        self.operations = []
         self.diff = {'before': {}, 'after': {}}
 
     @property
     def patch(self):
-        result = []
-        for attr in self.differences:
-            result.append({'op': 'replace', 'path': f'/{attr}', 'value': self.desired[attr]})
-        return result
+        return list(self.operations)
 
     def is_different(self):
-        '''Returns true if existing space is different to module params, otherwise false'''
-        different = False
+        '''Returns true if existing resource is different to module params, otherwise false'''
         for attr in self.desired:
             if self.desired[attr] is None:
                 continue
-            if self.desired[attr] != self.existing.get(attr):
-                different = True
+            if attr not in self.existing:
+                self.differences.append(attr)
+                self.operations.append(
+                    {'op': 'replace', 'path': _pointer((attr,)), 'value': self.desired[attr]})
+                continue
+            count = len(self.operations)
+            self._compare((attr,), self.existing[attr], self.desired[attr])
+            if len(self.operations) > count:
                 self.differences.append(attr)
 
         self._update_diff()
-        return different
+        return bool(self.differences)
+
+    def _compare(self, path: tuple, existing, desired):
+        '''Appends the operations that turn existing into desired at path'''
+        stack = [(path, existing, desired)]
+        while stack:
+            path, existing, desired = stack.pop()
+            if existing == desired:
+                continue
+            if not isinstance(existing, dict) or not isinstance(desired, dict):
+                self.operations.append({'op': 'replace', 'path': _pointer(path), 'value': desired})
+                continue
+
+            nested = []
+            for key in existing:
+                if key not in desired:
+                    self.operations.append({'op': 'remove', 'path': _pointer(path + (key,))})
+            for key, value in desired.items():
+                if key not in existing:
+                    self.operations.append({'op': 'add', 'path': _pointer(path + (key,)), 'value': value})
+                else:
+                    nested.append((path + (key,), existing[key], value))
+            stack.extend(reversed(nested))
 
     def _update_diff(self):
         for attr in self.differences:
@@ -46,6 +87,8 @@ class QlikDiff:
         return changes
 
     def apply_changes(self):
+        '''Returns a copy of existing with the desired changes applied'''
+        patched = dict(self.existing)
         for attr in self.differences:
-            self.existing[attr] = self.desired[attr]
-        return self.existing
\ No newline at end of file
+            patched[attr] = self.desired[attr]
+        return patched
@@ -1,13 +1,53 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import hashlib
+import json
+from contextlib import nullcontext
+
 from ansible.module_utils.basic import AnsibleModule
 
-from . import helper
+from . import diff_renderer, executor, helper, transport
 from .qlik_diff import QlikDiff
+from .space_resolver import SpaceResolver
 
 from requests.exceptions import HTTPError
 
+CONFLICT_STATUS_CODES = (409, 412)
+MAX_REPLANS = 3
+
+
+class Conflict(Exception):
+    '''Raised when a write conflicts with a change made elsewhere'''
+
+
+class ItemFailed(Exception):
+    '''Raised instead of exiting when one item of a batch fails'''
+
+    def __init__(self, msg: str, details: dict):
+        super().__init__(msg)
+        self.msg = msg
+        self.details = details
+
+
+class ItemModule:
+    '''Stands in for the AnsibleModule while one item of a batch is reconciled.
+
+    Params are the module params merged with the item, and fail_json
+    raises ItemFailed so other items, possibly on other threads, can finish.
+    Everything else is delegated to the module.
+    '''
+
+    def __init__(self, module: AnsibleModule, params: dict):
+        self.parent = module
+        self.params = params
+
+    def __getattr__(self, name):
+        return getattr(self.parent, name)
+
+    def fail_json(self, msg, **kwargs):
+        raise ItemFailed(msg, kwargs)
+
 
 class QlikCloudManager:
     def __init__(self, module: AnsibleModule):
@@ -17,6 +57,11 @@ class QlikCloudManager:
         self.patches = []
         self.patched = {}
         self.changes = {}
+        self._fetched = False
+        self._stale = False
+        self._resource = {}
+        self._state = None
+        self.batch = bool(self.module_params.get('items'))
 
         self.state = self.module_params['state'] if 'state' in self.module_params else 'present'
         if not hasattr(self, 'resource'):
@@ -31,22 +76,82 @@ class QlikCloudManager:
             }
         if not hasattr(self, 'patchable'):
             self.patchable = []
+        if not hasattr(self, 'space_resolver'):
+            self.space_resolver = SpaceResolver(module)
+        if not hasattr(self, 'snapshot'):
+            self.snapshot = None
         if not hasattr(self, 'states_map'):
             self.states_map = {
                 'present': self.ensure_present,
                 'absent': self.ensure_absent}
 
+    @property
+    def space_id(self):
+        '''Return ID of the space named by the space parameter'''
+        name = self.module_params.get('space')
+        space_id = self.space_resolver.resolve(name)
+        if name and space_id is None:
+            self.module.fail_json(msg="Space not found!", **self.results)
+        return space_id
+
     @property
     def exists(self):
-        return bool(self.existing() != {})
+        return bool(self.current() != {})
 
     def existing(self):
         return self.resource
 
+    def current(self):
+        '''Returns the existing resource, looking it up at most once until invalidated'''
+        if not self._fetched:
+            if self._stale:
+                self.resource = {}
+                self._stale = False
+            if self.from_snapshot():
+                return self._resource
+            self._resource = self.existing()
+            self._fetched = True
+            self.remember()
+        return self._resource
+
+    def from_snapshot(self) -> bool:
+        '''Uses a fresh snapshot entry instead of reading the tenant in check mode'''
+        if self.snapshot is None or not self.module.check_mode:
+            return False
+        age, state = self.snapshot.get(self.desired_key())
+        if age is None:
+            return False
+        self.seed(state)
+        self.results['snapshot_age'] = round(age)
+        return True
+
+    def remember(self):
+        '''Records the resource read from the tenant in the snapshot'''
+        if self.snapshot is not None:
+            self.snapshot.store(self.desired_key(), self.existing_state)
+
+    @property
+    def existing_state(self) -> dict:
+        '''Returns the existing resource converted to a dict, cached until invalidated'''
+        if self._state is None:
+            self._state = helper.asdict(self.current())
+        return self._state
+
+    def invalidate(self):
+        '''Marks the cached resource as stale after it was changed.
+
+        self.resource is kept until the next lookup, so code that runs right
+        after a change can still refer to the resource it changed.
+        '''
+        self._fetched = False
+        self._stale = True
+        self._resource = {}
+        self._state = None
+
     @property
     def different(self):
         '''Returns true if existing resource is different to module params, otherwise false'''
-        diffcheck = QlikDiff(existing=helper.asdict(self.existing()), desired=self.desired)
+        diffcheck = QlikDiff(existing=self.existing_state, desired=self.desired)
         is_different = diffcheck.is_different()
         if is_different:
             if diffcheck.can_patch(self.patchable):
@@ -56,22 +161,18 @@ class QlikCloudManager:
                 self.changes = diffcheck.get_changes()
         diffs = diffcheck.diff
         if self.module._diff and is_different and diffs['before'] and diffs['after']:
-            self.diff['before'] = "\n".join(
-                ["%s - %s" % (k, v) for k, v in sorted(
-                    diffs['before'].items())]) + "\n"
-            self.diff['after'] = "\n".join(
-                ["%s - %s" % (k, v) for k, v in sorted(
-                    diffs['after'].items())]) + "\n"
+            self.diff = diff_renderer.render(diffs['before'], diffs['after'], self.type)
         return is_different
 
     def create(self):
         if self.module.check_mode:
-            return self.existing()
+            return self.current()
 
         try:
             new_resource = self.client.create(self.desired)
             return new_resource
         except HTTPError as err:
+            self.raise_conflict(err)
             self.module.fail_json(
                 msg='Error creating %s, HTTP %s: %s' % (
                     self.type, err.response.status_code, err.response.text),
@@ -85,6 +186,7 @@ class QlikCloudManager:
             self.resource.delete()
             return {}
         except HTTPError as err:
+            self.raise_conflict(err, CONFLICT_STATUS_CODES + (404,))
             self.module.fail_json(
                 msg='Error deleting %s, HTTP %s: %s' % (
                     self.type, err.response.status_code, err.response.text),
@@ -92,12 +194,13 @@ class QlikCloudManager:
 
     def patch(self):
         if self.module.check_mode:
-            return self.existing()
+            return self.current()
 
         try:
             self.resource.patch(self.patches)
             return self.patched
         except HTTPError as err:
+            self.raise_conflict(err)
             self.module.fail_json(
                 msg='Error patching %s, HTTP %s: %s' % (
                     self.type, err.response.status_code, err.response.text),
@@ -105,47 +208,244 @@ class QlikCloudManager:
 
     def update(self):
         if self.module.check_mode:
-            return self.existing()
+            return self.current()
 
         try:
             updated = self.resource.set(self.desired)
             return updated
         except HTTPError as err:
+            self.raise_conflict(err)
             self.module.fail_json(
                 msg='Error patching %s, HTTP %s: %s' % (
                     self.type, err.response.status_code, err.response.text),
                 **self.results, patch=self.patches)
 
-    def ensure_present(self):
-        '''Ensure the resource exists'''
-        if not self.exists:
-            self.results[self.type] = helper.asdict(self.create())
-            self.results['changed'] = True
-            return
+    def raise_conflict(self, err: HTTPError, status_codes=CONFLICT_STATUS_CODES):
+        '''Raises Conflict if a failed write should be planned again from a fresh read'''
+        if err.response is not None and err.response.status_code in status_codes:
+            raise Conflict('HTTP %s: %s' % (err.response.status_code, err.response.text)) from err
 
+    def idempotency_key(self) -> str:
+        '''Returns a key that is the same for every run creating the same resource'''
+        return hashlib.sha256(json.dumps(
+            [self.module_params['tenant_uri'], self.type, self.desired],
+            sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def plan(self, present: bool = True):
+        '''Returns the call that reconciles the resource, or None if it is already in the desired state'''
+        self.patches = []
+        self.patched = {}
+        self.changes = {}
+        if not present:
+            return 'delete' if self.exists else None
+        if not self.exists:
+            return 'create'
         if not self.different:
-            self.results[self.type] = helper.asdict(self.existing())
-            return
+            return None
+        return 'patch' if self.patches else 'update'
 
-        if self.patches:
-            self.results[self.type] = helper.asdict(self.patch())
-            self.results['changed'] = True
+    def apply(self, action):
+        '''Makes the call returned by plan and records the result'''
+        if action is None:
+            if self.exists:
+                self.results[self.type] = self.existing_state
             return
 
-        self.results[self.type] = helper.asdict(self.update())
+        if action == 'create':
+            with transport.idempotency_key(self.idempotency_key()):
+                result = self.create()
+        else:
+            result = getattr(self, action)()
+        if action != 'delete':
+            self.results[self.type] = helper.asdict(result)
         self.results['changed'] = True
+        self.invalidate()
+        if self.snapshot is not None and not self.module.check_mode:
+            self.snapshot.forget(self.desired_key())
+
+    def reconcile(self, present: bool = True, limit=None):
+        '''Plans and applies the change, and returns the call that was made.
+
+        If the write conflicts with a change made elsewhere, such as a
+        failed If-Match or a resource created by a parallel run, the
+        resource is read again and the change planned again.
+        '''
+        for attempt in range(MAX_REPLANS + 1):
+            action = self.plan(present)
+            try:
+                with limit(action) if limit else nullcontext():
+                    self.apply(action)
+                return action
+            except Conflict as err:
+                self.module.log('conflict on %s %s, planning again: %s' % (action, self.type, err))
+                self.invalidate()
+        self.module.fail_json(
+            msg='Error reconciling %s, still conflicting after %s attempts' % (self.type, MAX_REPLANS + 1),
+            **self.results)
+
+    def ensure_present(self):
+        '''Ensure the resource exists'''
+        self.reconcile(present=True)
 
     def ensure_absent(self):
         '''Ensure the resource does not exist'''
-        if self.exists:
-            self.delete()
-            self.results['changed'] = True
+        self.reconcile(present=False)
+
+    def seed(self, resource):
+        '''Uses a resource found by a listing as the existing resource'''
+        self.resource = resource
+        self._resource = resource
+        self._fetched = True
+        self._stale = False
+        self._state = None
+
+    def list_existing(self):
+        '''Returns every resource of this type, modules that support items override this'''
+        self.module.fail_json(msg='%s does not support items' % self.type, **self.results)
+
+    def resource_key(self, resource):
+        '''Returns the natural key of a resource returned by list_existing'''
+        return resource['name'] if isinstance(resource, dict) else resource.name
+
+    def desired_key(self):
+        '''Returns the natural key of the resource described by the module params'''
+        return self.module_params.get('name')
+
+    def load(self, resource):
+        '''Returns the resource to reconcile against for an entry of list_existing'''
+        return resource
 
     def execute(self):
         '''Execute the desired action according to map of states and actions.'''
+        if self.module_params.get('tenants'):
+            return self.execute_tenants()
+        if self.batch:
+            return self.execute_batch()
+
         process_action = self.states_map[self.state]
         process_action()
 
+        return self.finalise_results()
+
+    def execute_batch(self):
+        '''Reconcile every entry of the items param against a single listing.
+
+        Each item is handled by a new manager for the module params merged
+        with the item, seeded from an index of the listing by natural key,
+        so only create, patch and delete calls are made per item. Items are
+        reconciled concurrently by a BoundedExecutor; an item that fails
+        does not stop the others, and the module fails after all have run.
+        '''
+        index = {}
+        for resource in self.list_existing():
+            index.setdefault(self.resource_key(resource), resource)
+
+        pool = executor.BoundedExecutor(executor.workers(), executor.limits())
+        unchanged = {}
+
+        def reconcile(item):
+            params = dict(self.module_params, items=None)
+            params.update({k: v for k, v in item.items() if v is not None})
+            manager = type(self)(ItemModule(self.module, params))
+            try:
+                found = index.get(manager.desired_key())
+                manager.seed(manager.load(found) if found is not None else {})
+                action = manager.reconcile(present=manager.state != 'absent', limit=pool.limit)
+                if action is None:
+                    unchanged[manager.desired_key()] = manager.existing_state
+            except ItemFailed as err:
+                return {**manager.results, **err.details, 'failed': True, 'msg': err.msg}
+            return manager
+
+        items = []
+        diffs = []
+        for outcome in pool.map(reconcile, self.module_params['items']):
+            if outcome.failed:
+                items.append({'changed': False, 'failed': True, 'msg': str(outcome.error)})
+            elif isinstance(outcome.value, dict):
+                items.append(outcome.value)
+            else:
+                items.append(outcome.value.item_results())
+                if outcome.value.diff:
+                    diffs.append(outcome.value.diff)
+
+        if self.snapshot is not None:
+            self.snapshot.store_many(unchanged)
+
+        self.results['items'] = items
+        self.results['changed'] = any(item['changed'] for item in items)
+        self.results.update(helper.request_stats(self.module))
+        if self.module._diff:
+            self.results['diff'] = diffs
+
+        failed = [item for item in items if item.get('failed')]
+        if failed:
+            self.module.fail_json(
+                msg='%s of %s items failed: %s' % (len(failed), len(items), failed[0]['msg']),
+                **self.results)
+
+        return self.results
+
+    def execute_tenants(self):
+        '''Run the module against every entry of the tenants param.
+
+        Each tenant is handled by a new manager for the module params with
+        the tenant URI and credentials of the entry, on a BoundedExecutor,
+        and gets its own clients, caches and request statistics. A tenant
+        that fails does not stop the others, and the module fails after all
+        have run.
+        '''
+        pool = executor.BoundedExecutor(executor.workers())
+
+        def run(tenant):
+            params = dict(self.module_params, tenants=None)
+            params.update({k: v for k, v in tenant.items() if k != 'name'})
+            try:
+                manager = type(self)(ItemModule(self.module, params))
+                return manager.execute()
+            except ItemFailed as err:
+                return {'changed': False, **err.details, 'failed': True, 'msg': err.msg}
+
+        tenants = []
+        for tenant, outcome in zip(self.module_params['tenants'], pool.map(run, self.module_params['tenants'])):
+            if outcome.failed:
+                result = {'changed': False, 'failed': True, 'msg': str(outcome.error)}
+            else:
+                result = outcome.value
+            tenants.append(dict(result, tenant=tenant['name'] or tenant['tenant_uri']))
+
+        self.results = {
+            'changed': any(result['changed'] for result in tenants),
+            'tenants': tenants,
+        }
+        if self.module._diff:
+            diffs = [result.pop('diff') for result in tenants if result.get('diff')]
+            self.results['diff'] = [d for diff in diffs for d in (diff if isinstance(diff, list) else [diff])]
+
+        failed = [result for result in tenants if result.get('failed')]
+        if failed:
+            self.module.fail_json(
+                msg='%s of %s tenants failed: %s: %s' % (
+                    len(failed), len(tenants), failed[0]['tenant'], failed[0]['msg']),
+                **self.results)
+
+        return self.results
+
+    def item_results(self):
+        '''Returns the results of one item of a batch, with return_fields applied'''
+        return_fields = self.module_params.get('return_fields')
+        if return_fields and self.type in self.results:
+            self.results[self.type] = helper.project(self.results[self.type], return_fields)
+        return self.results
+
+    def finalise_results(self):
+        '''Add request statistics and diff to the results and apply return_fields'''
+        return_fields = self.module_params.get('return_fields')
+        if return_fields and self.type in self.results:
+            self.results[self.type] = helper.project(self.results[self.type], return_fields)
+
+        self.results.update(helper.request_stats(self.module))
+
         if self.module._diff:
             self.results['diff'] = self.diff
 
@@ -0,0 +1,138 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import tempfile
+import time
+
+from requests.models import PreparedRequest
+
+from .cache import TenantCache, env_number
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+MAX_AGE = 7 * 24 * 3600
+
+
+def enabled() -> bool:
+    '''Returns true if the response cache was turned on with QLIK_CLOUD_RESPONSE_CACHE'''
+    return os.environ.get('QLIK_CLOUD_RESPONSE_CACHE', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+class ResponseCache:
+    '''Request and response interceptors that revalidate GET responses.
+
+    Responses to GET requests that carry an ETag or Last-Modified header
+    are stored on disk per tenant. Later requests for the same URL send
+    If-None-Match / If-Modified-Since, and a 304 is answered from the
+    stored body as if the tenant had returned it. Bodies are evicted least
+    recently used first once they exceed max_bytes in total.
+    '''
+
+    def __init__(self, tenant_uri: str, max_bytes: int = DEFAULT_MAX_BYTES, log=None):
+        self.index = TenantCache(tenant_uri, 'responses', MAX_AGE)
+        self.directory = os.path.splitext(self.index.path)[0]
+        self.max_bytes = max_bytes
+        self.log = log
+        self.hits = 0
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def request(self, req):
+        if req.method.upper() != 'GET':
+            return req
+        prepared = PreparedRequest()
+        prepared.prepare_url(req.url, req.params)
+        try:
+            entry = self.index.get(self._key(prepared.url))
+        except OSError:
+            return req
+        if not entry or not os.path.exists(self._body_path(self._key(prepared.url))):
+            return req
+
+        if entry.get('etag'):
+            req.headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            req.headers['If-Modified-Since'] = entry['last_modified']
+        return req
+
+    def response(self, res):
+        if res.request.method.upper() != 'GET':
+            return res
+        try:
+            if res.status_code == 304:
+                return self._revalidated(res)
+            if res.status_code == 200:
+                self._store(res)
+        except OSError as err:
+            if self.log:
+                self.log('response cache unavailable: %s' % err)
+        return res
+
+    def _revalidated(self, res):
+        key = self._key(res.request.url)
+        with self.index.locked() as data:
+            entry = data.get(key)
+            if not entry:
+                return res
+            with open(self._body_path(key), 'rb') as f:
+                body = f.read()
+            entry['value']['used'] = time.time()
+
+        res.status_code = 200
+        res.reason = 'OK'
+        res.headers.update(entry['value']['headers'])
+        res._content = body
+        res._content_consumed = True
+        self.hits += 1
+        return res
+
+    def _store(self, res):
+        etag = res.headers.get('ETag')
+        last_modified = res.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        body = res.content
+        if len(body) > self.max_bytes:
+            return
+
+        key = self._key(res.request.url)
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        with self.index.locked() as data:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, self._body_path(key))
+            now = time.time()
+            data[key] = {'time': now, 'value': {
+                'etag': etag,
+                'last_modified': last_modified,
+                'headers': {h: res.headers[h] for h in ('Content-Type',) if h in res.headers},
+                'size': len(body),
+                'used': now,
+            }}
+            self._evict(data, now)
+
+    def _evict(self, data: dict, now: float):
+        '''Drops expired entries, then least recently used ones until bodies fit in max_bytes'''
+        entries = sorted(data.items(), key=lambda item: item[1]['value']['used'])
+        total = sum(entry['value']['size'] for _, entry in entries)
+        for key, entry in entries:
+            if total <= self.max_bytes and now - entry['time'] <= MAX_AGE:
+                continue
+            total -= entry['value']['size']
+            del data[key]
+            try:
+                os.unlink(self._body_path(key))
+            except OSError:
+                pass
+
+
+def max_bytes() -> int:
+    '''Returns the response cache size limit from QLIK_CLOUD_RESPONSE_CACHE_MAX_BYTES'''
+    return int(env_number('QLIK_CLOUD_RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
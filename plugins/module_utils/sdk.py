@@ -0,0 +1,97 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''On-demand access to the Qlik SDK.
+
+Importing qlik_sdk runs its package __init__, which imports every REST API
+client as well as the Engine and websocket stack. Names imported from this
+module only load the SDK submodule that defines them, e.g.
+
+    from ..module_utils.sdk import Spaces
+
+Any other name, or a plain "from qlik_sdk import ..." elsewhere in the same
+process, loads the full SDK package as before.
+'''
+
+import importlib
+import importlib.util
+import sys
+
+_LOCATIONS = {
+    'Auth': 'auth',
+    'AuthType': 'auth_type',
+    'Config': 'config',
+    'ListableResource': 'listable',
+    'Qlik': 'qlik',
+    'AuthenticationException': 'rest',
+    'ConnectionException': 'rest',
+    'NoUrlException': 'rest',
+    'RestClient': 'rest',
+    '_get_dict': 'rest',
+    'generate_signed_token': 'generate_signed_token',
+    'Apps': 'apis.Apps',
+    'Automations': 'apis.Automations',
+    'RunDetailRequestObject': 'apis.Automations',
+    'CspOrigins': 'apis.Csp_Origins',
+    'Extensions': 'apis.Extensions',
+    'Groups': 'apis.Groups',
+    'IdentityProviders': 'apis.Identity_Providers',
+    'Items': 'apis.Items',
+    'Licenses': 'apis.Licenses',
+    'GenericObjectEntry': 'apis.Qix',
+    'GenericObjectProperties': 'apis.Qix',
+    'NxContainerEntry': 'apis.Qix',
+    'NxGetObjectOptions': 'apis.Qix',
+    'ReloadTasks': 'apis.Reload_Tasks',
+    'Reloads': 'apis.Reloads',
+    'Roles': 'apis.Roles',
+    'Space': 'apis.Spaces',
+    'Spaces': 'apis.Spaces',
+    'Theme': 'apis.Themes',
+    'Themes': 'apis.Themes',
+    'Filter': 'apis.Users',
+    'Users': 'apis.Users',
+    'WebIntegrations': 'apis.Web_Integrations',
+}
+
+
+def _package():
+    '''Registers the qlik_sdk package without running its __init__.
+
+    The full __init__ is run into the same module object the first time a
+    name is looked up on it that has not been imported yet.
+    '''
+    package = sys.modules.get('qlik_sdk')
+    if package is not None:
+        return package
+
+    spec = importlib.util.find_spec('qlik_sdk')
+    if spec is None:
+        raise ImportError("No module named 'qlik_sdk'", name='qlik_sdk')
+    package = importlib.util.module_from_spec(spec)
+
+    def load_all(name):
+        del package.__getattr__
+        spec.loader.exec_module(package)
+        return getattr(package, name)
+
+    package.__getattr__ = load_all
+    sys.modules['qlik_sdk'] = package
+    return package
+
+
+def import_module(name: str):
+    '''Imports a qlik_sdk submodule, e.g. "rest" or "apis.Spaces"'''
+    _package()
+    return importlib.import_module('qlik_sdk.' + name)
+
+
+def __getattr__(name):
+    if name in _LOCATIONS:
+        value = getattr(import_module(_LOCATIONS[name]), name)
+    elif name.startswith('__'):
+        raise AttributeError(name)
+    else:
+        value = getattr(_package(), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+
+from .cache import TenantCache, env_number
+
+DEFAULT_TTL = 0
+
+
+class Snapshot:
+    '''Local copy of the resources of one type, used to plan check mode runs offline.
+
+    Every live lookup records the resource found, or that none was found,
+    under its natural key. In check mode a fresh entry is used instead of
+    reading the tenant, and entries older than QLIK_CLOUD_SNAPSHOT_TTL
+    seconds fall back to a live read. The snapshot is off unless the TTL
+    is set, and entries are dropped when a run changes the resource.
+    '''
+
+    def __init__(self, module: AnsibleModule, resource_type: str):
+        self.module = module
+        self.ttl = env_number('QLIK_CLOUD_SNAPSHOT_TTL', DEFAULT_TTL)
+        self.cache = None
+        if self.ttl > 0:
+            self.cache = TenantCache(module.params['tenant_uri'], 'snapshot-' + resource_type, self.ttl)
+
+    @staticmethod
+    def _key(key) -> str:
+        return key if isinstance(key, str) else json.dumps(key)
+
+    def get(self, key):
+        '''Returns (age, state) for a fresh entry, state is {} if the resource did not exist.
+
+        Returns (None, None) if there is no fresh entry.
+        '''
+        if self.cache is None:
+            return None, None
+        try:
+            entry = self.cache.entry(self._key(key))
+        except OSError as err:
+            self.module.log('snapshot unavailable: %s' % err)
+            return None, None
+        if not entry:
+            return None, None
+        return time.time() - entry['time'], entry['value'] or {}
+
+    def store(self, key, state: dict):
+        '''Records the state of a resource read from the tenant'''
+        self.store_many({key: state})
+
+    def store_many(self, states: dict):
+        '''Records the states of several resources, keyed by natural key'''
+        if self.cache is None or not states:
+            return
+        try:
+            self.cache.update({self._key(key): state or None for key, state in states.items()})
+        except OSError as err:
+            self.module.log('snapshot unavailable: %s' % err)
+
+    def forget(self, key):
+        '''Drops a resource that was changed, so the next plan reads it live'''
+        if self.cache is None:
+            return
+        try:
+            self.cache.delete(self._key(key))
+        except OSError as err:
+            self.module.log('snapshot unavailable: %s' % err)
@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+from urllib.parse import urlparse
+
+from ansible.module_utils.basic import AnsibleModule
+
+from . import helper, transport
+from .cache import TenantCache, env_number
+from .sdk import Spaces
+
+DEFAULT_TTL = 300
+
+# full space listings read in this process, by tenant
+_listings = {}
+
+
+def _ttl() -> float:
+    return env_number('QLIK_CLOUD_SPACE_CACHE_TTL', DEFAULT_TTL)
+
+
+def _tenant(tenant_uri: str) -> str:
+    return urlparse(tenant_uri).netloc or tenant_uri
+
+
+def space_listing(tenant_uri: str, api_key: str, refresh: bool = False) -> list:
+    '''Returns every space of a tenant as dicts, listed at most once per TTL.
+
+    The listing is kept in this process and in a cache shared by forks for
+    QLIK_CLOUD_SPACE_CACHE_TTL seconds, and the names it reads are added to
+    the cache used by SpaceResolver. refresh lists the spaces again.
+    '''
+    ttl = _ttl()
+    cache = TenantCache(tenant_uri, 'space-listing', ttl) if ttl > 0 else None
+    if cache is not None and not refresh:
+        listed = _listings.get(_tenant(tenant_uri))
+        if listed is not None and time.time() - listed[0] <= ttl:
+            return listed[1]
+        try:
+            entry = cache.entry('spaces')
+        except OSError:
+            entry = None
+        if entry is not None:
+            _listings[_tenant(tenant_uri)] = (entry['time'], entry['value'])
+            return entry['value']
+
+    rest = transport.tenant_rest(tenant_uri, api_key)
+    spaces = []
+    path, params = '/spaces', {'limit': 100}
+    while path:
+        page = rest(path=path, method='GET', params=params).json()
+        spaces.extend(page.get('data', []))
+        # the next link carries the query and cursor of the following page
+        path = ((page.get('links') or {}).get('next') or {}).get('href')
+        params = None
+
+    if cache is not None:
+        _listings[_tenant(tenant_uri)] = (time.time(), spaces)
+        try:
+            cache.set('spaces', spaces)
+            TenantCache(tenant_uri, 'spaces', ttl).update({space['name']: space['id'] for space in spaces})
+        except OSError:
+            pass
+    return spaces
+
+
+def forget_listing(tenant_uri: str):
+    '''Drops the space listing of a tenant, after a space was changed'''
+    _listings.pop(_tenant(tenant_uri), None)
+    if _ttl() > 0:
+        TenantCache(tenant_uri, 'space-listing', _ttl()).delete('spaces')
+
+
+class SpaceResolver:
+    '''Resolves space names to IDs through a per-tenant cache shared across tasks.
+
+    A miss lists the spaces matching the name and caches every space in the
+    response, so later lookups for other spaces are often hits too. The
+    cache lifetime is QLIK_CLOUD_SPACE_CACHE_TTL seconds, and 0 disables it.
+    '''
+
+    def __init__(self, module: AnsibleModule):
+        self.module = module
+        self.ttl = _ttl()
+        self.cache = TenantCache(module.params['tenant_uri'], 'spaces', self.ttl) if self.ttl > 0 else None
+        self._client = None
+        self._ids = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = helper.get_client(self.module, Spaces)
+        return self._client
+
+    def _cached(self, name: str):
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.get(name)
+        except OSError as err:
+            self.module.log('space cache unavailable: %s' % err)
+            return None
+
+    def _store(self, spaces: dict):
+        if self.cache is None or not spaces:
+            return
+        try:
+            self.cache.update(spaces)
+        except OSError as err:
+            self.module.log('space cache unavailable: %s' % err)
+
+    def resolve(self, name: str):
+        '''Returns the ID of the named space, or None if it does not exist'''
+        if not name:
+            return name
+        if name in self._ids:
+            return self._ids[name]
+
+        space_id = self._cached(name)
+        if space_id is None:
+            spaces = {space.name: space.id for space in self.client.get_spaces(name=name, limit=100)}
+            self._store(spaces)
+            space_id = spaces.get(name)
+
+        if space_id is not None:
+            self._ids[name] = space_id
+        return space_id
+
+    def stored(self, name: str, space_id: str):
+        '''Records a space that was created or renamed'''
+        self.forget(space_id=space_id)
+        self._ids[name] = space_id
+        self._store({name: space_id})
+
+    def forget(self, name: str = None, space_id: str = None):
+        '''Drops a space that was deleted or renamed from the cache'''
+        for key in [k for k, v in self._ids.items() if k == name or v == space_id]:
+            del self._ids[key]
+        if self.cache is None:
+            return
+        try:
+            self.cache.delete_where(lambda k, v: k == name or v == space_id)
+            forget_listing(self.module.params['tenant_uri'])
+        except OSError as err:
+            self.module.log('space cache unavailable: %s' % err)
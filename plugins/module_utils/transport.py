@@ -0,0 +1,648 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import base64
+import datetime
+import math
+import platform
+import random
+import re
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from functools import reduce
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, rewind_body
+
+from ansible.module_utils.connection import Connection
+
+from . import sdk
+from .cache import TenantCache, env_number
+from .sdk import (
+    AuthType, AuthenticationException, ConnectionException, NoUrlException, RestClient, _get_dict)
+
+SDK_VERSION = sdk.import_module('_version').__version__
+
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_RETRIES = 5
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 30
+DEFAULT_TOKEN_MARGIN = 60
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+_ID_SEGMENT = re.compile(
+    r'^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{24}|[\w-]*\d[\w-]*)$',
+    re.IGNORECASE)
+
+_sessions = {}
+_breakers = {}
+_context = threading.local()
+_socket_path = None
+_refreshers = weakref.WeakSet()
+
+
+class ConnectionSession:
+    '''Sends requests through the qlik.cloud.tenant persistent connection.
+
+    The connection process holds the pooled sessions, so they stay open
+    between tasks. Only send() is provided, which is all the REST clients
+    and interceptors of this collection use.
+    '''
+
+    def __init__(self, socket_path: str):
+        self.connection = Connection(socket_path)
+
+    def send(self, request, timeout=None, stream=False, **kwargs) -> requests.Response:
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        elif body is not None and not isinstance(body, bytes):
+            body = body.read()
+        result = self.connection.http_request(
+            request.method, request.url, dict(request.headers),
+            base64.b64encode(body).decode('ascii') if body is not None else None,
+            timeout=timeout)
+        if result.get('error') == 'timeout':
+            raise requests.exceptions.Timeout(result['message'], request=request)
+        if result.get('error'):
+            raise requests.exceptions.ConnectionError(result['message'], request=request)
+
+        res = requests.Response()
+        res.status_code = result['status']
+        res.reason = result['reason']
+        res.headers = CaseInsensitiveDict(result['headers'])
+        res.encoding = get_encoding_from_headers(res.headers)
+        res._content = base64.b64decode(result['body'])
+        res._content_consumed = True
+        res.url = request.url
+        res.request = request
+        res.elapsed = datetime.timedelta(seconds=result['elapsed'])
+        return res
+
+    def close(self):
+        pass
+
+
+def use_connection(socket_path: str):
+    '''Sends all requests of this process through the persistent connection at socket_path'''
+    global _socket_path
+    if socket_path != _socket_path:
+        close_sessions()
+        _socket_path = socket_path
+
+
+def get_session(host: str, pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> requests.Session:
+    '''Returns the keep-alive session shared by every client for a host in this process.
+
+    When use_connection was called, the session sends requests through the
+    persistent connection instead.
+    '''
+    key = urlparse(host).netloc or host
+    session = _sessions.get(key)
+    if session is None and _socket_path:
+        session = _sessions[key] = ConnectionSession(_socket_path)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            pool_block=False)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _sessions[key] = session
+    return session
+
+
+def close_sessions():
+    '''Closes all pooled sessions and their connections'''
+    for session in _sessions.values():
+        session.close()
+    _sessions.clear()
+
+
+def stop_token_refreshers():
+    '''Stops the renewal timers of every TokenRefresher, once the modules using them are done'''
+    for refresher in list(_refreshers):
+        refresher.stop()
+
+
+class CircuitOpenException(ConnectionException):
+    '''Raised instead of sending a request while the circuit for a tenant is open'''
+
+
+class CircuitBreaker:
+    '''Fails fast when a tenant keeps failing, with state shared by all forks.
+
+    Connection errors, timeouts and 5xx responses count as failures. After
+    threshold consecutive failures the circuit opens and requests fail at
+    once with CircuitOpenException. Once cooldown seconds have passed, one
+    request is let through as a probe: if it succeeds the circuit closes,
+    otherwise it opens for another cooldown. The state is kept in a
+    lock-protected file per tenant, so every fork sees the same circuit.
+    '''
+
+    def __init__(self, host: str, threshold: int = DEFAULT_BREAKER_THRESHOLD,
+                 cooldown: float = DEFAULT_BREAKER_COOLDOWN):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.cache = TenantCache(host, 'circuit', ttl=24 * 3600)
+
+    def _state(self) -> dict:
+        try:
+            return self.cache.get('state') or {}
+        except OSError:
+            return {}
+
+    def before(self):
+        '''Raises CircuitOpenException unless a request may be sent now'''
+        state = self._state()
+        if not state.get('opened'):
+            return
+        now = time.time()
+        if now < state['opened'] + self.cooldown or now < (state.get('probe') or 0) + self.cooldown:
+            raise CircuitOpenException('Circuit open for %s after %s consecutive failures, retrying in %.0fs' % (
+                self.host, state.get('failures', 0),
+                max(state['opened'], state.get('probe') or 0) + self.cooldown - now))
+        try:
+            self._claim_probe(now)
+        except OSError:
+            pass
+
+    def _claim_probe(self, now: float):
+        with self.cache.locked() as data:
+            entry = data.get('state')
+            state = entry['value'] if entry else {}
+            if state.get('opened') and now < (state.get('probe') or 0) + self.cooldown:
+                raise CircuitOpenException('Circuit open for %s, a probe request is in flight' % self.host)
+            if state.get('opened'):
+                state['probe'] = now
+                data['state'] = {'time': now, 'value': state}
+
+    def success(self):
+        if not self._state():
+            return
+        with self.cache.locked() as data:
+            data.pop('state', None)
+
+    def failure(self):
+        now = time.time()
+        with self.cache.locked() as data:
+            entry = data.get('state')
+            state = entry['value'] if entry else {}
+            state['failures'] = state.get('failures', 0) + 1
+            if state.get('probe') or state['failures'] >= self.threshold:
+                state['opened'] = now
+                state['probe'] = None
+            data['state'] = {'time': now, 'value': state}
+
+
+def token_margin() -> float:
+    '''Returns the seconds before expiry at which an OAuth token is renewed, from QLIK_CLOUD_TOKEN_MARGIN'''
+    return env_number('QLIK_CLOUD_TOKEN_MARGIN', DEFAULT_TOKEN_MARGIN)
+
+
+def get_breaker(host: str):
+    '''Returns the circuit breaker for a tenant, or None if disabled with QLIK_CLOUD_BREAKER_THRESHOLD=0'''
+    threshold = int(env_number('QLIK_CLOUD_BREAKER_THRESHOLD', DEFAULT_BREAKER_THRESHOLD))
+    if threshold <= 0:
+        return None
+    key = urlparse(host).netloc or host
+    breaker = _breakers.get(key)
+    if breaker is None:
+        breaker = _breakers[key] = CircuitBreaker(
+            host, threshold, env_number('QLIK_CLOUD_BREAKER_COOLDOWN', DEFAULT_BREAKER_COOLDOWN))
+    return breaker
+
+
+class PooledRestClient(RestClient):
+    '''RestClient that sends requests through a shared, pooled session.
+
+    The SDK opens and closes a new session for every call, so each request
+    pays for a fresh TCP and TLS handshake. This client keeps the same
+    request building and interceptor semantics but reuses the connections
+    held by the session returned from get_session.
+    '''
+
+    def __init__(self, config, interceptors=None, pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> None:
+        super().__init__(config)
+        if interceptors is not None:
+            self._interceptors = interceptors
+        self.session = get_session(config.host, pool_maxsize)
+        self.breaker = get_breaker(config.host)
+
+    def _record(self, ok: bool):
+        '''Reports the outcome of a request to the circuit breaker'''
+        if self.breaker is None:
+            return
+        try:
+            if ok:
+                self.breaker.success()
+            else:
+                self.breaker.failure()
+        except OSError:
+            pass
+
+    def rest(self, path: str, method="GET", data=None, files=None, params: dict = None,
+             headers: dict = None, stream: bool = False, timeout: int = 10) -> requests.Response:
+        if not self.base_url:
+            raise NoUrlException("Caller has no 'base_url'")
+        if path.lower().startswith(('http://', 'https://')):
+            path = path.split(self.base_url)[1]
+        elif not path.lower().startswith((
+                '/api/v1', '/login/jwt-session', '/oauth/token', '/oauth/authorize', '/oauth/revoke')):
+            path = '/api/v1' + path
+
+        headers = dict(headers) if headers else {}
+        if self.config.auth_type == AuthType.APIKey:
+            headers['authorization'] = 'Bearer ' + self.config.api_key
+        elif self.config.auth_type == AuthType.OAuth2:
+            if self.config.client_secret and path == '/oauth/token':
+                client_str = self.config.client_id + ':' + self.config.client_secret
+                headers['authorization'] = 'Basic ' + base64.b64encode(
+                    client_str.encode('utf-8')).decode('utf-8')
+            elif self.config.client_secret:
+                headers['authorization'] = 'Bearer ' + self.config.api_key
+        headers['User-Agent'] = 'qlik-sdk-python/%s (%s)' % (SDK_VERSION[1:], platform.system())
+
+        json_data = None
+        if data and not isinstance(data, bytes):
+            json_data = _get_dict(data)
+            if json_data:
+                data = None
+        if params:
+            params = _get_dict(params)
+
+        req = requests.Request(
+            method,
+            self.base_url.strip('/') + path,
+            data=data,
+            json=json_data,
+            files=files,
+            headers=headers,
+            params=params,
+        )
+        req = reduce(lambda d, f: f(d), self._interceptors['request'].handlers, req)
+
+        if self.breaker is not None:
+            self.breaker.before()
+        try:
+            res = self.session.send(
+                req.prepare(),
+                timeout=timeout,
+                stream=stream)
+        except requests.exceptions.Timeout:
+            self._record(False)
+            raise ConnectionException('Connection Timeout: ' + self.base_url)
+        except requests.exceptions.RequestException as exc:
+            self._record(False)
+            raise ConnectionException('Connection Error: ' + self.base_url) from exc
+
+        res = reduce(lambda r, f: f(r), self._interceptors['response'].handlers, res)
+        self._record(res.status_code < 500)
+
+        try:
+            res.raise_for_status()
+        except Exception as err:
+            res.close()
+            if res.status_code == 401:
+                error = 'Failed to authenticate'
+                try:
+                    error = res.json()['errors'][0]['title']
+                except Exception:
+                    pass
+                raise AuthenticationException(error)
+            raise err
+
+        return res
+
+
+def pool_client(client, pool_maxsize: int = DEFAULT_POOL_MAXSIZE):
+    '''Routes every REST client reachable from an SDK client through the pooled session.
+
+    Returns the list of Auth objects that were pooled, so callers can register
+    interceptors on each of them.
+    '''
+    auths = []
+    for auth in [getattr(client, 'auth', None)] + [
+            getattr(v, 'auth', None) for v in vars(client).values()]:
+        if auth is None or not hasattr(auth, 'rest') or any(auth is a for a in auths):
+            continue
+        rest = auth.rest
+        if not isinstance(rest._restClient, PooledRestClient):
+            rest._restClient = PooledRestClient(
+                auth.config, rest.interceptors, pool_maxsize=pool_maxsize)
+        auths.append(auth)
+    return auths
+
+
+def tenant_rest(host: str, api_key: str, pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                retries: int = DEFAULT_RETRIES):
+    '''Returns a pooled REST callable for a tenant that retries throttled requests.
+
+    For plugins that call the REST API on the controller without a module,
+    e.g. inventory plugins: rest(path='/users/me', method='GET').
+    '''
+    auth = sdk.Auth(sdk.Config(host=host, auth_type=AuthType.APIKey, api_key=api_key))
+    rest = auth.rest
+    rest._restClient = PooledRestClient(auth.config, rest.interceptors, pool_maxsize=pool_maxsize)
+    rest.interceptors['response'].use([RetryInterceptor(retries=retries)])
+    return rest
+
+
+class RetryInterceptor:
+    '''Response interceptor that resends throttled and failed requests.
+
+    A 429 means the tenant did not process the request, so any method is
+    resent; other retryable statuses are only resent for idempotent methods.
+    The delay honours Retry-After when present, otherwise it backs off
+    exponentially with full jitter. Streamed bodies that cannot be rewound
+    are never resent.
+    '''
+
+    def __init__(self, retries: int = DEFAULT_RETRIES, backoff: float = 0.5,
+                 max_backoff: float = 30, timeout: int = 60, log=None):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.log = log
+        self.count = 0
+
+    def retryable(self, res) -> bool:
+        if res.status_code not in RETRY_STATUS_CODES:
+            return False
+        if res.status_code != 429 and res.request.method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        body = res.request.body
+        if body is None or isinstance(body, (bytes, str)):
+            return True
+        return getattr(res.request, '_body_position', None) is not None
+
+    def delay(self, res, attempt: int) -> float:
+        retry_after = res.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+            try:
+                return min(max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0),
+                           self.max_backoff)
+            except (TypeError, ValueError):
+                pass
+        return random.uniform(0, min(self.backoff * 2 ** attempt, self.max_backoff))
+
+    def __call__(self, res):
+        attempt = 0
+        while attempt < self.retries and self.retryable(res):
+            delay = self.delay(res, attempt)
+            if self.log:
+                self.log("retry: %s %s -> %s, attempt %s in %.2fs" % (
+                    res.request.method, res.request.url, res.status_code, attempt + 1, delay))
+            time.sleep(delay)
+            request = res.request
+            if not isinstance(request.body, (bytes, str, type(None))):
+                rewind_body(request)
+            try:
+                retried = get_session(request.url).send(request, timeout=self.timeout)
+            except requests.exceptions.RequestException:
+                return res
+            res.close()
+            res = retried
+            attempt += 1
+            self.count += 1
+        return res
+
+
+def path_template(url: str) -> str:
+    '''Returns the path of a URL with resource IDs replaced by {id}'''
+    return '/'.join(
+        '{id}' if len(segment) >= 16 and _ID_SEGMENT.match(segment) else segment
+        for segment in urlparse(url).path.split('/'))
+
+
+def percentile(values: list, pct: float) -> float:
+    '''Returns the nearest-rank percentile of a list of values'''
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100.0 * len(ordered)) - 1, 0)] if ordered else 0
+
+
+class CallMetrics:
+    '''Request and response interceptors that time every REST call.
+
+    The request hook records when a call starts on the current thread, and
+    the response hook records the method, path template, status, bytes
+    received and wall-clock latency, including any retries in between.
+    '''
+
+    def __init__(self):
+        self.calls = []
+        self._local = threading.local()
+
+    def request(self, req):
+        self._local.start = time.monotonic()
+        return req
+
+    def response(self, res):
+        start = getattr(self._local, 'start', None)
+        latency = time.monotonic() - start if start is not None else res.elapsed.total_seconds()
+        self._local.start = None
+        size = res.headers.get('Content-Length')
+        if size is None and hasattr(res.raw, 'tell'):
+            size = res.raw.tell()
+        self.calls.append({
+            'method': res.request.method,
+            'path': path_template(res.request.url),
+            'status': res.status_code,
+            'bytes': int(size or 0),
+            'time': latency,
+        })
+        return res
+
+    def summary(self) -> dict:
+        '''Returns call count, total time and p50/p95 latency per endpoint'''
+        endpoints = {}
+        for call in self.calls:
+            endpoint = endpoints.setdefault('%s %s' % (call['method'], call['path']), {
+                'count': 0, 'bytes': 0, 'statuses': {}, 'times': []})
+            endpoint['count'] += 1
+            endpoint['bytes'] += call['bytes']
+            endpoint['statuses'][call['status']] = endpoint['statuses'].get(call['status'], 0) + 1
+            endpoint['times'].append(call['time'])
+
+        for endpoint in endpoints.values():
+            times = endpoint.pop('times')
+            endpoint['total_time'] = round(sum(times), 4)
+            endpoint['p50'] = round(percentile(times, 50), 4)
+            endpoint['p95'] = round(percentile(times, 95), 4)
+
+        return {
+            'count': len(self.calls),
+            'total_time': round(sum(call['time'] for call in self.calls), 4),
+            'endpoints': endpoints,
+        }
+
+
+@contextmanager
+def idempotency_key(key: str):
+    '''Sends key as the Idempotency-Key of POST requests made on this thread inside the block'''
+    previous = getattr(_context, 'idempotency_key', None)
+    _context.idempotency_key = key
+    try:
+        yield
+    finally:
+        _context.idempotency_key = previous
+
+
+class ConditionalWrites:
+    '''Request and response interceptors for optimistic concurrency.
+
+    The strong ETag last returned for a resource URL is sent as If-Match
+    when the same URL is patched, replaced or deleted, so the write fails
+    with 412 instead of overwriting a change made in between. POST requests
+    made inside idempotency_key() carry an Idempotency-Key header, so a
+    create that is sent twice is only carried out once.
+    '''
+
+    def __init__(self):
+        self.etags = {}
+
+    def request(self, req):
+        method = req.method.upper()
+        if method in ('PATCH', 'PUT', 'DELETE') and 'If-Match' not in req.headers:
+            etag = self.etags.get(req.url.split('?')[0])
+            if etag:
+                req.headers['If-Match'] = etag
+        elif method == 'POST':
+            key = getattr(_context, 'idempotency_key', None)
+            if key and 'Idempotency-Key' not in req.headers:
+                req.headers['Idempotency-Key'] = key
+        return req
+
+    def response(self, res):
+        if not res.ok:
+            return res
+        url = res.request.url.split('?')[0]
+        etag = res.headers.get('ETag')
+        if res.request.method.upper() == 'DELETE':
+            self.etags.pop(url, None)
+        elif etag and not etag.startswith('W/'):
+            self.etags[url] = etag
+        return res
+
+
+class TokenRefresher:
+    '''Request and response interceptors that keep an OAuth access token fresh.
+
+    A daemon timer renews the token margin seconds before it expires, so
+    long-running modules and async tasks do not outlive it. If the timer
+    could not renew it in time the next request renews it first. A 401 is
+    retried once with a new token, unless another thread already renewed
+    the one that was rejected. fetch() must return an OAuth token response
+    with access_token and expires_in.
+    '''
+
+    def __init__(self, fetch, token: str, expires_at: float = None,
+                 margin: float = DEFAULT_TOKEN_MARGIN, timeout: int = 60, log=None):
+        self.fetch = fetch
+        self.token = token
+        self.expires_at = expires_at
+        self.margin = margin
+        self.timeout = timeout
+        self.log = log
+        self.configs = []
+        self.count = 0
+        self._lock = threading.Lock()
+        self._timer = None
+        self.schedule()
+        _refreshers.add(self)
+
+    def bind(self, config):
+        '''Keeps the api_key of an SDK config in step with the token'''
+        config.api_key = self.token
+        self.configs.append(config)
+
+    def schedule(self):
+        '''Starts the timer that renews the token before it expires'''
+        if self._timer is not None:
+            self._timer.cancel()
+        if self.expires_at is None:
+            return
+        self._timer = threading.Timer(
+            max(self.expires_at - self.margin - time.time(), 0), self._background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def stop(self):
+        '''Cancels the renewal timer'''
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _background(self):
+        try:
+            self.refresh()
+        except Exception as err:
+            if self.log:
+                self.log('token refresh failed: %s' % err)
+
+    def refresh(self, rejected: str = None):
+        '''Fetches a new token, unless the rejected token was already replaced'''
+        with self._lock:
+            if rejected is not None and rejected != self.token:
+                return
+            token = self.fetch()
+            self.token = token['access_token']
+            expires_in = token.get('expires_in')
+            self.expires_at = time.time() + float(expires_in) if expires_in else None
+            for config in self.configs:
+                config.api_key = self.token
+            self.count += 1
+            if self.log:
+                self.log('token refreshed, expires in %ss' % expires_in)
+        self.schedule()
+
+    def request(self, req):
+        if self.expires_at is not None and self.expires_at - self.margin <= time.time():
+            try:
+                self.refresh(rejected=self.token)
+            except Exception as err:
+                if self.log:
+                    self.log('token refresh failed: %s' % err)
+        req.headers['authorization'] = 'Bearer ' + self.token
+        return req
+
+    def response(self, res):
+        if res.status_code != 401:
+            return res
+        request = res.request
+        rejected = request.headers.get('authorization', '')[len('Bearer '):]
+        if not isinstance(request.body, (bytes, str, type(None))):
+            if getattr(request, '_body_position', None) is None:
+                return res
+            rewind_body(request)
+        try:
+            self.refresh(rejected=rejected)
+        except Exception as err:
+            if self.log:
+                self.log('token refresh failed: %s' % err)
+            return res
+        request = request.copy()
+        request.headers['authorization'] = 'Bearer ' + self.token
+        if self.log:
+            self.log('retry: %s %s -> 401 with a new token' % (request.method, request.url))
+        try:
+            retried = get_session(request.url).send(request, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            return res
+        res.close()
+        return retried
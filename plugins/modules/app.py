@@ -42,6 +42,13 @@ options:
       - reloaded
       - absent
     default: present
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -50,6 +57,29 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
+  tenants:
+    description:
+      - Tenants to run the module against at the same time, each with C(name), C(tenant_uri) and C(api_key), and optionally the C(client_id) and C(client_secret) that issued it.
+      - Set by the action plugin from the inventory hosts and groups named in C(tenants), in which case I(tenant_uri) and I(api_key) are taken from the first tenant.
+      - Results are returned for each tenant in C(tenants), in the same order.
+    type: list
+    elements: dict
+    required: false
 '''
 
 EXAMPLES = '''
@@ -109,7 +139,6 @@ class QlikAppManager(QlikCloudManager):
             'app': {},
         }
         self.resource = {}
-        self._space_id = ''
         self.desired = helper.construct_state_from_params(module.params, ignore_params=['file'])
         self.states_map = {
             'present': self.ensure_present,
@@ -118,21 +147,6 @@ class QlikAppManager(QlikCloudManager):
 
         super().__init__(module)
 
-    @property
-    def space_id(self):
-        if self._space_id:
-            return self._space_id
-        if self.module_params['space'] == '':
-            return ''
-
-        space_results = self.client.spaces.get_spaces(name=self.module_params['space'])
-        if len(space_results) == 0:
-            self.module.fail_json(msg="Space not found!", **self.results)
-        for space in space_results:
-            if space.name == self.module_params['space']:
-                self._space_id = space.id
-                return self._space_id
-
     def existing(self):
         '''Return existing app'''
         if self.resource:
@@ -265,8 +279,13 @@ def main():
         origin_app_id=dict(type='str', required=False),
         file=dict(type='str', required=False),
         state=dict(type='str', required=False, default='present'),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
         api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False),
+        tenants=dict(type='list', elements='dict', required=False, options=helper.tenant_options()),
     )
 
     module = AnsibleModule(
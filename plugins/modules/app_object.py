@@ -26,6 +26,13 @@ options:
       - absent
       - published
     default: present
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -34,6 +41,21 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
 '''
 
 EXAMPLES = '''
@@ -56,7 +78,7 @@ from ..module_utils.qlik_manager import QlikCloudManager
 
 import json
 
-from qlik_sdk import Apps, GenericObjectProperties, GenericObjectEntry
+from ..module_utils.sdk import Apps, GenericObjectProperties, GenericObjectEntry
 
 
 class QlikAppObjectManager(QlikCloudManager):
@@ -83,7 +105,7 @@ class QlikAppObjectManager(QlikCloudManager):
 
     def existing(self):
         '''Return existing app object'''
-        if self.resource != {}:
+        if self.resource:
             return self.resource
 
         try:
@@ -148,10 +170,7 @@ class QlikAppObjectManager(QlikCloudManager):
                 msg='Error opening app: %s' % (to_native(err)),
                 **self.results)
 
-        if self.module._diff:
-            self.results['diff'] = self.diff
-
-        return self.results
+        return self.finalise_results()
 
 
 def main():
@@ -163,8 +182,12 @@ def main():
           required=False,
           default='present',
           options=['present', 'absent', 'published']),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
-        api_key=dict(type='str', required=True, no_log=True)
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False)
     )
 
     module = AnsibleModule(
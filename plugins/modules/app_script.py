@@ -33,6 +33,13 @@ options:
       - present
       - absent
     default: present
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -41,6 +48,21 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
 '''
 
 EXAMPLES = '''
@@ -71,13 +93,13 @@ EXAMPLES = '''
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.common.text.converters import to_native
 
-from ..module_utils import helper
+from ..module_utils import diff_renderer, helper
 from ..module_utils.qlik_manager import QlikCloudManager
 
 from requests.exceptions import HTTPError
 import re
 
-from qlik_sdk import Apps, GenericObjectProperties, GenericObjectEntry
+from ..module_utils.sdk import Apps, GenericObjectProperties, GenericObjectEntry
 
 
 class QlikAppScriptManager(QlikCloudManager):
@@ -107,8 +129,7 @@ class QlikAppScriptManager(QlikCloudManager):
                 flags=re.I)
 
         if self.module._diff:
-            self.diff['before'] = self.existing()
-            self.diff['after'] = self.desired
+            self.diff = diff_renderer.render(self.existing(), self.desired, 'script')
         return self.desired != self.existing()
 
     def existing(self):
@@ -156,10 +177,7 @@ class QlikAppScriptManager(QlikCloudManager):
             process_action = self.states_map[self.state]
             process_action()
 
-        if self.module._diff:
-            self.results['diff'] = self.diff
-
-        return self.results
+        return self.finalise_results()
 
 
 def main():
@@ -173,8 +191,12 @@ def main():
             required=False,
             default='present',
             options=['present', 'absent']),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
-        api_key=dict(type='str', required=True, no_log=True)
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False)
     )
 
     module = AnsibleModule(
@@ -36,6 +36,13 @@ options:
       - present
       - absent
     default: present
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -44,6 +51,29 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
+  tenants:
+    description:
+      - Tenants to run the module against at the same time, each with C(name), C(tenant_uri) and C(api_key), and optionally the C(client_id) and C(client_secret) that issued it.
+      - Set by the action plugin from the inventory hosts and groups named in C(tenants), in which case I(tenant_uri) and I(api_key) are taken from the first tenant.
+      - Results are returned for each tenant in C(tenants), in the same order.
+    type: list
+    elements: dict
+    required: false
 '''
 
 EXAMPLES = '''
@@ -143,7 +173,7 @@ from ..module_utils.qlik_manager import QlikCloudManager
 
 from requests.exceptions import HTTPError
 
-from qlik_sdk import ListableResource
+from ..module_utils.sdk import ListableResource
 
 
 class QlikDataConnectionManager(QlikCloudManager):
@@ -154,7 +184,6 @@ class QlikDataConnectionManager(QlikCloudManager):
             'data_connection': {},
         }
         self.resource = {}
-        self._space_id = ''
         self.client = helper.get_client(module)
 
         super().__init__(module)
@@ -163,24 +192,9 @@ class QlikDataConnectionManager(QlikCloudManager):
     def different(self):
         return False
 
-    @property
-    def space_id(self):
-        if self._space_id:
-            return self._space_id
-        if self.module_params['space'] == '':
-            return ''
-
-        space_results = self.client.spaces.get_spaces(name=self.module_params['space'])
-        if len(space_results) == 0:
-            self.module.fail_json(msg="Space not found!", **self.results)
-        for space in space_results:
-            if space.name == self.module_params['space']:
-                self._space_id = space.id
-                return self._space_id
-
     def existing(self):
         '''Return existing reload task'''
-        if self.resource != {}:
+        if self.resource:
             return self.resource
 
         query_params = {'spaceId': self.space_id} if self.space_id else {'personal': True}
@@ -232,8 +246,13 @@ def main():
         space=dict(type='str', required=False),
         connection_properties=dict(type='dict', required=True),
         state=dict(type='str', required=False, default='present'),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
-        api_key=dict(type='str', required=True, no_log=True)
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False),
+        tenants=dict(type='list', elements='dict', required=False, options=helper.tenant_options())
     )
 
     module = AnsibleModule(
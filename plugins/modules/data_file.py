@@ -65,6 +65,13 @@ options:
       - present
       - absent
     default: present
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -73,6 +80,29 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
+  tenants:
+    description:
+      - Tenants to run the module against at the same time, each with C(name), C(tenant_uri) and C(api_key), and optionally the C(client_id) and C(client_secret) that issued it.
+      - Set by the action plugin from the inventory hosts and groups named in C(tenants), in which case I(tenant_uri) and I(api_key) are taken from the first tenant.
+      - Results are returned for each tenant in C(tenants), in the same order.
+    type: list
+    elements: dict
+    required: false
 '''
 
 EXAMPLES = '''
@@ -108,28 +138,11 @@ class QlikDataFileManager(QlikCloudManager):
             'data_file': {},
         }
         self.resource = {}
-        self._space_id = ''
         self._conn_id = ''
         self.desired = helper.construct_state_from_params(module.params, ['file', 'space', 'owner_id'])
 
         super().__init__(module)
 
-    @property
-    def space_id(self):
-        '''Return space ID from name'''
-        if self._space_id:
-            return self._space_id
-        if self.module_params['space'] == '':
-            return ''
-
-        space_results = self.client.spaces.get_spaces(name=self.module_params['space'])
-        if len(space_results) == 0:
-            self.module.fail_json(msg="Space not found!", **self.results)
-        for space in space_results:
-            if space.name == self.module_params['space']:
-                self._space_id = space.id
-                return self._space_id
-
     @property
     def connection_id(self):
         '''Return connection ID for space'''
@@ -150,7 +163,7 @@ class QlikDataFileManager(QlikCloudManager):
 
     def existing(self):
         '''Return existing data file'''
-        if self.resource != {}:
+        if self.resource:
             return self.resource
 
         results = self.client.datafiles.get_data_files(
@@ -164,7 +177,7 @@ class QlikDataFileManager(QlikCloudManager):
 
     def create(self):
         if self.module.check_mode:
-            return self.existing()
+            return self.current()
 
         try:
             with open(self.module_params['file'], 'rb') as f:
@@ -226,8 +239,13 @@ def main():
         owner_id=dict(type='str', required=False),
         file=dict(type='str', required=True),
         state=dict(type='str', required=False, default='present'),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
-        api_key=dict(type='str', required=True, no_log=True)
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False),
+        tenants=dict(type='list', elements='dict', required=False, options=helper.tenant_options())
     )
 
     module = AnsibleModule(
@@ -31,6 +31,13 @@ options:
       - present
       - absent
     default: present
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -39,6 +46,29 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
+  tenants:
+    description:
+      - Tenants to run the module against at the same time, each with C(name), C(tenant_uri) and C(api_key), and optionally the C(client_id) and C(client_secret) that issued it.
+      - Set by the action plugin from the inventory hosts and groups named in C(tenants), in which case I(tenant_uri) and I(api_key) are taken from the first tenant.
+      - Results are returned for each tenant in C(tenants), in the same order.
+    type: list
+    elements: dict
+    required: false
 '''
 
 EXAMPLES = '''
@@ -56,7 +86,7 @@ from ..module_utils.qlik_manager import QlikCloudManager
 from requests.exceptions import HTTPError
 import hashlib
 
-from qlik_sdk import Extensions
+from ..module_utils.sdk import Extensions
 
 
 class QlikExtensionManager(QlikCloudManager):
@@ -73,7 +103,7 @@ class QlikExtensionManager(QlikCloudManager):
 
     def existing(self):
         '''Return existing extension'''
-        if self.resource != {}:
+        if self.resource:
             return self.resource
 
         results = self.client.get_extensions()
@@ -88,7 +118,7 @@ class QlikExtensionManager(QlikCloudManager):
 
     def create(self):
         if self.module.check_mode:
-            return self.existing()
+            return self.current()
 
         try:
             with open(self.module_params['file'], 'rb') as f:
@@ -102,7 +132,7 @@ class QlikExtensionManager(QlikCloudManager):
 
     def update(self):
         if self.module.check_mode:
-            return self.existing()
+            return self.current()
 
         try:
             existing = self.client.get(self.resource.id)
@@ -129,8 +159,13 @@ def main():
         file=dict(type='str', required=True),
         type=dict(type='str', required=False, default='visualization', options=['visualization']),
         state=dict(type='str', required=False, default='present'),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
-        api_key=dict(type='str', required=True, no_log=True)
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False),
+        tenants=dict(type='list', elements='dict', required=False, options=helper.tenant_options())
     )
 
     module = AnsibleModule(
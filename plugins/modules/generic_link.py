@@ -12,7 +12,8 @@ options:
   name:
     description:
       - Name of the link
-    required: true
+      - Required unless I(items) is set.
+    required: false
   description:
     description:
       - Description of the link
@@ -20,7 +21,8 @@ options:
   link:
     description:
       - URL of the link
-    required: true
+      - Required unless I(items) is set.
+    required: false
   owner_id:
     description:
       - ID of the owner
@@ -37,6 +39,22 @@ options:
       - present
       - absent
     default: present
+  items:
+    description:
+      - List of links to manage in one task, each with the options above.
+      - Options not set on an item are taken from the task, so shared values such as C(space) or C(owner_id) only need to be set once.
+      - The existing links are listed once and only the items that differ are changed.
+      - Results are returned for each item in C(items), in the same order.
+    type: list
+    elements: dict
+    required: false
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -45,6 +63,29 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
+  tenants:
+    description:
+      - Tenants to run the module against at the same time, each with C(name), C(tenant_uri) and C(api_key), and optionally the C(client_id) and C(client_secret) that issued it.
+      - Set by the action plugin from the inventory hosts and groups named in C(tenants), in which case I(tenant_uri) and I(api_key) are taken from the first tenant.
+      - Results are returned for each tenant in C(tenants), in the same order.
+    type: list
+    elements: dict
+    required: false
 '''
 
 EXAMPLES = '''
@@ -64,6 +105,15 @@ EXAMPLES = '''
     name: Qlik website
     link: https://www.qlik.com
     space: Development
+
+  # Create several links in the same space.
+  qlik.cloud.generic_link:
+    space: Development
+    items:
+      - name: Qlik website
+        link: https://www.qlik.com
+      - name: Qlik help
+        link: https://help.qlik.com
 '''
 
 
@@ -71,8 +121,9 @@ from ansible.module_utils.basic import AnsibleModule
 
 from ..module_utils import helper
 from ..module_utils.qlik_manager import QlikCloudManager
+from ..module_utils.snapshot import Snapshot
 
-from qlik_sdk import ListableResource
+from ..module_utils.sdk import ListableResource
 
 class QlikLinkManager(QlikCloudManager):
     def __init__(self, module: AnsibleModule):
@@ -82,28 +133,13 @@ class QlikLinkManager(QlikCloudManager):
             'link': {},
         }
         self.resource = {}
-        self._space_id = ''
+        self.snapshot = Snapshot(module, self.type)
 
         super().__init__(module)
 
-    @property
-    def space_id(self):
-        if self._space_id:
-            return self._space_id
-        if self.module_params['space'] == '':
-            return ''
-
-        space_results = self.client.spaces.get_spaces(name=self.module_params['space'])
-        if len(space_results) == 0:
-            self.module.fail_json(msg="Space not found!", **self.results)
-        for space in space_results:
-            if space.name == self.module_params['space']:
-                self._space_id = space.id
-                return self._space_id
-
     def existing(self):
         '''Return existing link'''
-        if self.resource != {}:
+        if self.resource:
             return self.resource
 
         query_params = {
@@ -124,6 +160,19 @@ class QlikLinkManager(QlikCloudManager):
 
         return self.resource
 
+    def list_existing(self):
+        return self.client.items.get_items(resourceType='genericlink', limit=100).pagination
+
+    def resource_key(self, resource):
+        return (resource.name, resource.spaceId or None)
+
+    def desired_key(self):
+        return (self.module_params['name'], self.space_id)
+
+    def load(self, resource):
+        link = self.client.rest(method='GET', path=f'/generic-links/{resource.resourceId}')
+        return link.json()['data'][0]
+
     def create(self):
         if self.module.check_mode:
             self.results['link']=helper.asdict(self.resource)
@@ -169,18 +218,29 @@ class QlikLinkManager(QlikCloudManager):
 
 def main():
     module_args = dict(
-        name=dict(type='str', required=True),
+        name=dict(type='str', required=False),
         description=dict(type='str', required=False),
-        link=dict(type='str', required=True),
+        link=dict(type='str', required=False),
         owner_id=dict(type='str', required=False),
         space=dict(type='str', required=False),
         state=dict(type='str', required=False, default='present'),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
-        api_key=dict(type='str', required=True, no_log=True)
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False),
+        tenants=dict(type='list', elements='dict', required=False, options=helper.tenant_options())
     )
 
+    module_args['items'] = dict(
+        type='list', elements='dict', required=False,
+        options=helper.item_options(module_args))
+
     module = AnsibleModule(
         argument_spec=module_args,
+        required_one_of=[('name', 'items'), ('link', 'items')],
+        mutually_exclusive=[('name', 'items')],
         supports_check_mode=True
     )
 
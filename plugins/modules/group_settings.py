@@ -17,6 +17,13 @@ options:
     description:
       - Determines if groups should be created on login.
     required: true
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -25,6 +32,29 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
+  tenants:
+    description:
+      - Tenants to run the module against at the same time, each with C(name), C(tenant_uri) and C(api_key), and optionally the C(client_id) and C(client_secret) that issued it.
+      - Set by the action plugin from the inventory hosts and groups named in C(tenants), in which case I(tenant_uri) and I(api_key) are taken from the first tenant.
+      - Results are returned for each tenant in C(tenants), in the same order.
+    type: list
+    elements: dict
+    required: false
 '''
 
 EXAMPLES = '''
@@ -43,7 +73,7 @@ from ..module_utils.qlik_manager import QlikCloudManager
 
 from requests.exceptions import HTTPError
 
-from qlik_sdk import Groups
+from ..module_utils.sdk import Groups
 
 
 class QlikGroupSettingsManager(QlikCloudManager):
@@ -68,7 +98,7 @@ class QlikGroupSettingsManager(QlikCloudManager):
 
     def patch(self):
         if self.module.check_mode:
-            return self.existing()
+            return self.current()
 
         try:
             self.client.patch_settings(self.patches)
@@ -89,8 +119,13 @@ def main():
     module_args = dict(
         auto_create_groups=dict(type='bool', required=True),
         sync_idp_groups=dict(type='bool', required=True),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
-        api_key=dict(type='str', required=True, no_log=True)
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False),
+        tenants=dict(type='list', elements='dict', required=False, options=helper.tenant_options())
     )
 
     module = AnsibleModule(
@@ -12,11 +12,13 @@ options:
   name:
     description:
       - Name of the space
-    required: true
+      - Required unless I(items) is set.
+    required: false
   type:
     description:
       - Type of space
-    required: true
+      - Required unless I(items) is set.
+    required: false
     choices:
       - data
       - managed
@@ -39,6 +41,22 @@ options:
   allow_recreate:
     description: Allow space to be deleted and recreated if the type changes
     default: false
+  items:
+    description:
+      - List of spaces to manage in one task, each with the options above.
+      - Options not set on an item are taken from the task, so shared values such as C(state) or C(type) only need to be set once.
+      - The existing spaces are listed once and only the items that differ are changed.
+      - Results are returned for each item in C(items), in the same order.
+    type: list
+    elements: dict
+    required: false
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -47,6 +65,29 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
+  tenants:
+    description:
+      - Tenants to run the module against at the same time, each with C(name), C(tenant_uri) and C(api_key), and optionally the C(client_id) and C(client_secret) that issued it.
+      - Set by the action plugin from the inventory hosts and groups named in C(tenants), in which case I(tenant_uri) and I(api_key) are taken from the first tenant.
+      - Results are returned for each tenant in C(tenants), in the same order.
+    type: list
+    elements: dict
+    required: false
 '''
 
 EXAMPLES = '''
@@ -69,14 +110,25 @@ EXAMPLES = '''
   qlik.cloud.space:
     name: Test
     owner_id: R2aCCzAa_fvf1s-NI9XU2y467l-g4sX6
+
+  # Create several shared spaces in one task.
+  qlik.cloud.space:
+    type: shared
+    items:
+      - name: Development
+      - name: Test
+        description: Acceptance testing
+      - name: Sandbox
+        state: absent
 '''
 
 
 from ansible.module_utils.basic import AnsibleModule
 from ..module_utils import helper
 from ..module_utils.qlik_manager import QlikCloudManager
+from ..module_utils.snapshot import Snapshot
 
-from qlik_sdk import Spaces
+from ..module_utils.sdk import Spaces
 
 
 class QlikSpaceManager(QlikCloudManager):
@@ -91,12 +143,13 @@ class QlikSpaceManager(QlikCloudManager):
             module.params, ignore_params=['allow_recreate'])
         self.patchable = ['name', 'description', 'ownerId']
         self.client = helper.get_client(module, Spaces)
+        self.snapshot = Snapshot(module, self.type)
 
         super().__init__(module)
 
     def existing(self):
         '''Return existing space'''
-        if self.resource != {}:
+        if self.resource:
             return self.resource
 
         results = self.client.get_spaces(filter=f'name eq "{self.module_params["name"]}"')
@@ -104,6 +157,27 @@ class QlikSpaceManager(QlikCloudManager):
             self.resource = results[0]
         return self.resource
 
+    def list_existing(self):
+        return self.client.get_spaces(limit=100).pagination
+
+    def create(self):
+        space = super().create()
+        if not self.module.check_mode:
+            self.space_resolver.stored(space.name, space.id)
+        return space
+
+    def patch(self):
+        patched = super().patch()
+        if not self.module.check_mode:
+            self.space_resolver.stored(patched['name'], self.resource.id)
+        return patched
+
+    def delete(self):
+        result = super().delete()
+        if not self.module.check_mode:
+            self.space_resolver.forget(self.resource.name, self.resource.id)
+        return result
+
     def update(self):
         if not self.module_params['allow_recreate']:
             self.module.warn('Space type changed but allow_recreate set to false')
@@ -115,18 +189,29 @@ class QlikSpaceManager(QlikCloudManager):
 
 def main():
     module_args = dict(
-        name=dict(type='str', required=True),
-        type=dict(type='str', required=True),
+        name=dict(type='str', required=False),
+        type=dict(type='str', required=False),
         description=dict(type='str', required=False),
         owner_id=dict(type='str', required=False),
         state=dict(type='str', required=False, default='present'),
         allow_recreate=dict(type='bool', required=False, default=False),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
-        api_key=dict(type='str', required=True, no_log=True)
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False),
+        tenants=dict(type='list', elements='dict', required=False, options=helper.tenant_options())
     )
 
+    module_args['items'] = dict(
+        type='list', elements='dict', required=False,
+        options=helper.item_options(module_args))
+
     module = AnsibleModule(
         argument_spec=module_args,
+        required_one_of=[('name', 'items'), ('type', 'items')],
+        mutually_exclusive=[('name', 'items')],
         supports_check_mode=True
     )
 
@@ -58,6 +58,13 @@ options:
       - present
       - absent
     default: present
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -66,6 +73,29 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
+  tenants:
+    description:
+      - Tenants to run the module against at the same time, each with C(name), C(tenant_uri) and C(api_key), and optionally the C(client_id) and C(client_secret) that issued it.
+      - Set by the action plugin from the inventory hosts and groups named in C(tenants), in which case I(tenant_uri) and I(api_key) are taken from the first tenant.
+      - Results are returned for each tenant in C(tenants), in the same order.
+    type: list
+    elements: dict
+    required: false
 '''
 
 EXAMPLES = '''
@@ -85,7 +115,7 @@ from ansible.module_utils.basic import AnsibleModule
 from ..module_utils import helper
 from ..module_utils.qlik_manager import QlikCloudManager
 
-from qlik_sdk import Users, Filter
+from ..module_utils.sdk import Users, Roles, Filter
 
 
 class QlikUserManager(QlikCloudManager):
@@ -109,9 +139,9 @@ class QlikUserManager(QlikCloudManager):
 
     def get_role_ids(self):
         '''Get IDs of the assigned roles'''
-        client = helper.get_client(self.module)
+        client = helper.get_client(self.module, Roles)
         roles = [
-            client.roles.get_roles(filter=f'name eq "{role}"')
+            client.get_roles(filter=f'name eq "{role}"')
             for role in self.module_params['assigned_roles']]
 
         self.desired['assignedRoles'] = [
@@ -120,7 +150,7 @@ class QlikUserManager(QlikCloudManager):
 
     def existing(self):
         '''Return existing space'''
-        if self.resource != {}:
+        if self.resource:
             return self.resource
 
         self.get_role_ids()
@@ -156,8 +186,13 @@ def main():
         status=dict(type='str', required=False),
         state=dict(type='str', required=False, default='present'),
         allow_recreate=dict(type='bool', required=False, default=False),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
-        api_key=dict(type='str', required=True, no_log=True)
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False),
+        tenants=dict(type='list', elements='dict', required=False, options=helper.tenant_options())
     )
 
     module = AnsibleModule(
@@ -12,11 +12,28 @@ options:
   name:
     description:
       - Name of the web integration.
+      - Required unless I(items) is set.
     required: false
   valid_origins:
     description:
       - List of origins that are valid for the web integration.
     required: false
+  items:
+    description:
+      - List of web integrations to manage in one task, each with the options above.
+      - Options not set on an item are taken from the task, so shared values such as C(valid_origins) only need to be set once.
+      - The existing web integrations are listed once and only the items that differ are changed.
+      - Results are returned for each item in C(items), in the same order.
+    type: list
+    elements: dict
+    required: false
+  return_fields:
+    description:
+      - List of keys or JSON pointers to return for the resource, e.g. C(id) or C(/attributes/name).
+      - All fields are returned if not set.
+    type: list
+    elements: str
+    required: false
   tenant_uri:
     description:
       - Base URI of the tenant
@@ -25,6 +42,29 @@ options:
     description:
       - Bearer token for authentication
     required: true
+  client_id:
+    description:
+      - ID of the OAuth client that issued I(api_key).
+      - If set with I(client_secret), the token is renewed before it expires and a request rejected with 401 is retried once with a new token.
+      - Set by the action plugin when it requests the token.
+    required: false
+  client_secret:
+    description:
+      - Secret of the OAuth client in I(client_id)
+    required: false
+  token_expires_at:
+    description:
+      - Unix time at which I(api_key) expires
+    type: float
+    required: false
+  tenants:
+    description:
+      - Tenants to run the module against at the same time, each with C(name), C(tenant_uri) and C(api_key), and optionally the C(client_id) and C(client_secret) that issued it.
+      - Set by the action plugin from the inventory hosts and groups named in C(tenants), in which case I(tenant_uri) and I(api_key) are taken from the first tenant.
+      - Results are returned for each tenant in C(tenants), in the same order.
+    type: list
+    elements: dict
+    required: false
 '''
 
 EXAMPLES = '''
@@ -33,6 +73,14 @@ EXAMPLES = '''
     name: Website
     valid_origins: https://www.qlik.com
 
+  # Create several web integrations in one task
+  qlik.cloud.web_integration:
+    items:
+      - name: Website
+        valid_origins: https://www.qlik.com
+      - name: Portal
+        valid_origins: https://portal.qlik.com
+
 '''
 
 
@@ -40,8 +88,9 @@ from ansible.module_utils.basic import AnsibleModule
 
 from ..module_utils import helper
 from ..module_utils.qlik_manager import QlikCloudManager
+from ..module_utils.snapshot import Snapshot
 
-from qlik_sdk import WebIntegrations
+from ..module_utils.sdk import WebIntegrations
 
 
 class QlikWebIntegrationManager(QlikCloudManager):
@@ -54,6 +103,7 @@ class QlikWebIntegrationManager(QlikCloudManager):
         self.resource = {}
         self.patchable = ['validOrigins']
         self.client = helper.get_client(module, WebIntegrations)
+        self.snapshot = Snapshot(module, self.type)
 
         super().__init__(module)
 
@@ -70,17 +120,31 @@ class QlikWebIntegrationManager(QlikCloudManager):
 
         return self.resource
 
+    def list_existing(self):
+        return self.client.get_web_integrations(limit=100).pagination
+
 
 def main():
     module_args = dict(
-        name=dict(type='str', required=True),
+        name=dict(type='str', required=False),
         valid_origins=dict(type='list', required=False),
+        return_fields=dict(type='list', elements='str', required=False),
         tenant_uri=dict(type='str', required=True),
-        api_key=dict(type='str', required=True, no_log=True)
+        api_key=dict(type='str', required=True, no_log=True),
+        client_id=dict(type='str', required=False),
+        client_secret=dict(type='str', required=False, no_log=True),
+        token_expires_at=dict(type='float', required=False),
+        tenants=dict(type='list', elements='dict', required=False, options=helper.tenant_options())
     )
 
+    module_args['items'] = dict(
+        type='list', elements='dict', required=False,
+        options=helper.item_options(module_args))
+
     module = AnsibleModule(
         argument_spec=module_args,
+        required_one_of=[('name', 'items')],
+        mutually_exclusive=[('name', 'items')],
         supports_check_mode=True
     )
 